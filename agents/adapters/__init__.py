@@ -2,6 +2,8 @@
 AutoSentry AI - Agent Adapters Package
 """
 
+import importlib
+
 from .base_adapter import (
     BaseAgentAdapter,
     AgentType,
@@ -9,13 +11,31 @@ from .base_adapter import (
     AgentTask,
     AgentResult,
     AgentToolRegistry,
-    tool_registry
+    tool_registry,
+    short_id,
+    iso_now,
+    sort_tasks_by_priority
 )
 
 from .builtin_adapter import BuiltinAdapter, BuiltinAgent
-from .langgraph_adapter import LangGraphAdapter
-from .crewai_adapter import CrewAIAdapter
-from .autogen_adapter import AutoGenAdapter
+
+# Framework adapters are loaded on first access (PEP 562) so importing the
+# package doesn't pull in langgraph/crewai/autogen unless they are used
+_LAZY_ADAPTERS = {
+    "LangGraphAdapter": ".langgraph_adapter",
+    "CrewAIAdapter": ".crewai_adapter",
+    "AutoGenAdapter": ".autogen_adapter",
+}
+
+
+def __getattr__(name):
+    if name in _LAZY_ADAPTERS:
+        module = importlib.import_module(_LAZY_ADAPTERS[name], __name__)
+        adapter = getattr(module, name)
+        globals()[name] = adapter
+        return adapter
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 __all__ = [
     # Base classes
@@ -26,6 +46,9 @@ __all__ = [
     "AgentResult",
     "AgentToolRegistry",
     "tool_registry",
+    "short_id",
+    "iso_now",
+    "sort_tasks_by_priority",
     # Adapters
     "BuiltinAdapter",
     "BuiltinAgent",
@@ -3,26 +3,268 @@ AutoSentry AI - AutoGen Agent Framework Adapter
 Adapter for Microsoft's AutoGen multi-agent framework
 """
 
-from typing import Dict, Any, List, Callable, Optional
+from typing import Dict, Any, List, Callable, Deque, Iterator, Mapping, Optional, Tuple
+from collections import OrderedDict, defaultdict, deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from itertools import groupby
+from types import MappingProxyType
+import asyncio
+import functools
+import hashlib
+import json
 import logging
+import sqlite3
+import threading
 import time
-import uuid
 from datetime import datetime
 
 from .base_adapter import (
-    BaseAgentAdapter, AgentType, AgentTask, AgentResult
+    BaseAgentAdapter, AgentType, AgentTask, AgentResult, AGENT_TYPE_VALUES,
+    short_id, sort_tasks_by_priority
 )
 
 logger = logging.getLogger(__name__)
 
-# Optional AutoGen imports
+# Optional AutoGen import, deferred to first use (see _load_autogen) since
+# autogen pulls in openai, tiktoken etc. at import time
+autogen = None
 AUTOGEN_AVAILABLE = False
-try:
-    import autogen
-    from autogen import AssistantAgent, UserProxyAgent, GroupChat, GroupChatManager
-    AUTOGEN_AVAILABLE = True
-except ImportError:
-    logger.warning("AutoGen not installed. Install with: pip install pyautogen")
+_autogen_import_attempted = False
+
+
+def _load_autogen() -> bool:
+    """Import AutoGen on first use and report whether it is available"""
+    global autogen, AUTOGEN_AVAILABLE, _autogen_import_attempted
+    
+    if not _autogen_import_attempted:
+        _autogen_import_attempted = True
+        try:
+            import autogen as autogen_module
+            autogen = autogen_module
+            AUTOGEN_AVAILABLE = True
+        except ImportError:
+            logger.warning("AutoGen not installed. Install with: pip install pyautogen")
+    
+    return AUTOGEN_AVAILABLE
+
+# Task type -> agent type routing
+TASK_TYPE_MAPPING: Mapping[str, AgentType] = MappingProxyType({
+    "analyze": AgentType.DATA_ANALYSIS,
+    "diagnose": AgentType.DIAGNOSIS,
+    "engage": AgentType.CUSTOMER_ENGAGEMENT,
+    "schedule": AgentType.SCHEDULING,
+    "feedback": AgentType.FEEDBACK,
+    "rca_capa": AgentType.RCA_CAPA
+})
+
+# Agent system messages by type
+_SYSTEM_MESSAGES: Mapping[AgentType, str] = MappingProxyType({
+    AgentType.MASTER: """You are the Master Orchestrator for AutoSentry AI vehicle maintenance system.
+Your role is to coordinate all maintenance activities, delegate tasks to specialized agents,
+and ensure optimal system operation. You have expertise in automotive systems and predictive maintenance.""",
+    
+    AgentType.DATA_ANALYSIS: """You are a Data Analysis Specialist for AutoSentry AI.
+Your role is to analyze vehicle telemetry data, identify patterns, detect anomalies,
+and provide insights for predictive maintenance. Focus on sensor data interpretation.""",
+    
+    AgentType.DIAGNOSIS: """You are a Vehicle Diagnostics Expert for AutoSentry AI.
+Your role is to diagnose vehicle issues based on telemetry data and analysis results.
+Determine root causes and severity of problems. Provide technical recommendations.""",
+    
+    AgentType.CUSTOMER_ENGAGEMENT: """You are a Customer Success Manager for AutoSentry AI.
+Your role is to communicate with customers about vehicle maintenance needs.
+Be empathetic, clear, and helpful. Generate appropriate messages for chat and voice.""",
+    
+    AgentType.SCHEDULING: """You are a Service Scheduling Coordinator for AutoSentry AI.
+Your role is to schedule service appointments based on diagnosis priority and customer availability.
+Optimize scheduling for minimal customer disruption.""",
+    
+    AgentType.FEEDBACK: """You are a Customer Feedback Analyst for AutoSentry AI.
+Your role is to collect, analyze, and act on customer feedback.
+Identify trends and areas for improvement.""",
+    
+    AgentType.RCA_CAPA: """You are a Quality Engineer for AutoSentry AI.
+Your role is to perform Root Cause Analysis (RCA) and develop
+Corrective and Preventive Actions (CAPA) for manufacturing insights."""
+})
+
+_DEFAULT_SYSTEM_MESSAGE = "You are an AI assistant for vehicle maintenance."
+
+# Fallback outputs by agent type (used when no LLM is available)
+_FALLBACK_RESPONSES: Mapping[AgentType, Mapping[str, Any]] = MappingProxyType({
+    AgentType.DATA_ANALYSIS: MappingProxyType({
+        "analysis": "Data analysis complete",
+        "patterns_detected": ("normal_operation",),
+        "anomalies": ()
+    }),
+    AgentType.DIAGNOSIS: MappingProxyType({
+        "diagnosis": "No critical issues found",
+        "recommendations": ("Continue regular maintenance",)
+    }),
+    AgentType.CUSTOMER_ENGAGEMENT: MappingProxyType({
+        "message": "Thank you for using AutoSentry AI. Your vehicle is in good condition.",
+        "channel": "chat"
+    }),
+    AgentType.SCHEDULING: MappingProxyType({
+        "status": "available"
+    }),
+    AgentType.FEEDBACK: MappingProxyType({
+        "survey_sent": True
+    }),
+    AgentType.RCA_CAPA: MappingProxyType({
+        "rca_complete": True
+    })
+})
+
+_DEFAULT_FALLBACK_RESPONSE: Mapping[str, Any] = MappingProxyType({"status": "completed"})
+
+# Fallback output field -> ID prefix, generated fresh per call
+_FALLBACK_ID_FIELDS: Mapping[AgentType, Tuple[str, str]] = MappingProxyType({
+    AgentType.SCHEDULING: ("appointment_id", "APT"),
+    AgentType.FEEDBACK: ("feedback_id", "FB"),
+    AgentType.RCA_CAPA: ("capa_id", "CAPA")
+})
+
+
+@functools.lru_cache(maxsize=512)
+def _normalize_agent_name(agent_id: str) -> str:
+    """AutoGen agent names must not contain dashes"""
+    return agent_id.replace("-", "_")
+
+
+class PromptCache:
+    """
+    Content-addressed cache for LLM responses.
+    
+    Responses are keyed by SHA-256 of model, system prompt and user prompt.
+    A bounded in-memory LRU sits in front of a persistent store so repeated
+    prompts skip the LLM round-trip entirely. The store is a SQLite table,
+    or a size-bounded diskcache directory when cache_dir is given so that
+    worker processes and restarts share responses.
+    """
+    
+    def __init__(
+        self,
+        db_path: str = ":memory:",
+        ttl_days: int = 7,
+        l1_size: int = 1024,
+        cache_dir: Optional[str] = None,
+        size_limit: int = int(1e9)
+    ):
+        self.ttl_days = ttl_days
+        self.l1_size = l1_size
+        # prompt_hash -> (wall-clock expiry, response), so L1 never outlives the store
+        self._l1: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk = None
+        self._conn = None
+        
+        if cache_dir:
+            try:
+                import diskcache
+                self._disk = diskcache.Cache(
+                    cache_dir,
+                    size_limit=size_limit,
+                    eviction_policy="least-recently-used"
+                )
+                return
+            except ImportError:
+                logger.warning("diskcache not installed, using SQLite prompt cache. Install with: pip install diskcache")
+        
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS prompt_cache (
+                prompt_hash TEXT PRIMARY KEY,
+                model TEXT,
+                response_text TEXT,
+                input_tokens INTEGER,
+                output_tokens INTEGER,
+                latency_ms REAL,
+                created_at REAL,
+                ttl_days INTEGER
+            )"""
+        )
+        self._conn.commit()
+    
+    @staticmethod
+    def make_key(model: str, system_prompt: str, user_prompt: str) -> str:
+        """Build the cache key for a prompt"""
+        return hashlib.sha256(f"{model}|{system_prompt}|{user_prompt}".encode()).hexdigest()
+    
+    def get(self, prompt_hash: str) -> Optional[str]:
+        """Get a cached response, or None on miss/expiry"""
+        with self._lock:
+            entry = self._l1.get(prompt_hash)
+            if entry is not None:
+                expires_at, response_text = entry
+                if time.time() < expires_at:
+                    self._l1.move_to_end(prompt_hash)
+                    return response_text
+                del self._l1[prompt_hash]
+            
+            if self._disk is not None:
+                response_text, expires_at = self._disk.get(prompt_hash, expire_time=True)
+                if response_text is not None:
+                    self._remember(prompt_hash, response_text, expires_at)
+                return response_text
+            
+            row = self._conn.execute(
+                "SELECT response_text, created_at, ttl_days FROM prompt_cache WHERE prompt_hash = ?",
+                (prompt_hash,)
+            ).fetchone()
+            if not row:
+                return None
+            
+            response_text, created_at, ttl_days = row
+            if time.time() - created_at > ttl_days * 86400:
+                self._conn.execute("DELETE FROM prompt_cache WHERE prompt_hash = ?", (prompt_hash,))
+                self._conn.commit()
+                return None
+            
+            self._remember(prompt_hash, response_text, created_at + ttl_days * 86400)
+            return response_text
+    
+    def put(
+        self,
+        prompt_hash: str,
+        model: str,
+        response_text: str,
+        latency_ms: float = 0,
+        input_tokens: Optional[int] = None,
+        output_tokens: Optional[int] = None
+    ):
+        """Store a response"""
+        with self._lock:
+            self._remember(prompt_hash, response_text, time.time() + self.ttl_days * 86400)
+            
+            if self._disk is not None:
+                self._disk.set(prompt_hash, response_text, expire=self.ttl_days * 86400)
+                return
+            
+            self._conn.execute(
+                "INSERT OR REPLACE INTO prompt_cache VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (prompt_hash, model, response_text, input_tokens, output_tokens,
+                 latency_ms, time.time(), self.ttl_days)
+            )
+            self._conn.commit()
+    
+    def _remember(self, prompt_hash: str, response_text: str, expires_at: Optional[float]):
+        """Insert into the in-memory LRU until expires_at (caller holds the lock)"""
+        if expires_at is None:
+            expires_at = float("inf")
+        self._l1[prompt_hash] = (expires_at, response_text)
+        self._l1.move_to_end(prompt_hash)
+        if len(self._l1) > self.l1_size:
+            self._l1.popitem(last=False)
+    
+    def close(self):
+        """Close the underlying store"""
+        with self._lock:
+            self._l1.clear()
+            if self._disk is not None:
+                self._disk.close()
+            else:
+                self._conn.close()
 
 
 class AutoGenAdapter(BaseAgentAdapter):
@@ -41,10 +283,19 @@ class AutoGenAdapter(BaseAgentAdapter):
         self.autogen_agents: Dict[str, Any] = {}
         self.user_proxy = None
         self.llm_config = None
+        self.prompt_cache: Optional[PromptCache] = None
+        # Agent type -> agent IDs, maintained by create_agent
+        self._type_index: Dict[AgentType, List[str]] = defaultdict(list)
+        # Task type -> selected agent ID, invalidated whenever agents change
+        self._route_cache: Dict[str, Optional[str]] = {}
+        # Bound concurrent LLM round-trips to respect provider rate limits
+        self._semaphore = asyncio.Semaphore(self.config.get("max_concurrency", 10))
+        # Chats block on LLM I/O, so threads overlap them within a priority tier
+        self.executor = ThreadPoolExecutor(max_workers=self.config.get("workers", 8))
     
     def initialize(self) -> bool:
         """Initialize AutoGen framework"""
-        if not AUTOGEN_AVAILABLE:
+        if not _load_autogen():
             logger.error("AutoGen is not installed")
             return False
         
@@ -58,7 +309,9 @@ class AutoGenAdapter(BaseAgentAdapter):
                         "model": self.config.get("llm_model", "gpt-4-turbo-preview"),
                         "api_key": llm_api_key
                     }],
-                    "temperature": 0.1
+                    "temperature": 0.1,
+                    # Responses are cached by PromptCache; disable AutoGen's disk cache
+                    "cache_seed": self.config.get("cache_seed")
                 }
             else:
                 # Use local/mock config
@@ -70,19 +323,27 @@ class AutoGenAdapter(BaseAgentAdapter):
                 }
             
             # Create user proxy agent
-            self.user_proxy = UserProxyAgent(
+            self.user_proxy = autogen.UserProxyAgent(
                 name="user_proxy",
                 human_input_mode="NEVER",
                 max_consecutive_auto_reply=5,
                 code_execution_config=False
             )
             
+            if self.config.get("prompt_cache", True):
+                self.prompt_cache = PromptCache(
+                    db_path=self.config.get("prompt_cache_path", ":memory:"),
+                    ttl_days=self.config.get("prompt_cache_ttl_days", 7),
+                    cache_dir=self.config.get("cache_dir"),
+                    size_limit=self.config.get("cache_size_limit", int(1e9))
+                )
+            
             logger.info("AutoGen framework initialized")
             self.is_initialized = True
             return True
             
-        except Exception as e:
-            logger.error(f"Failed to initialize AutoGen: {e}")
+        except Exception:
+            logger.exception("Failed to initialize AutoGen")
             return False
     
     def create_agent(
@@ -93,51 +354,17 @@ class AutoGenAdapter(BaseAgentAdapter):
         config: Dict[str, Any] = None
     ) -> Any:
         """Create an AutoGen agent"""
-        if not AUTOGEN_AVAILABLE:
+        if not _load_autogen():
             logger.error("AutoGen not available")
             return None
         
         config = config or {}
         
-        # Define agent system messages based on type
-        system_messages = {
-            AgentType.MASTER: """You are the Master Orchestrator for AutoSentry AI vehicle maintenance system.
-Your role is to coordinate all maintenance activities, delegate tasks to specialized agents,
-and ensure optimal system operation. You have expertise in automotive systems and predictive maintenance.""",
-            
-            AgentType.DATA_ANALYSIS: """You are a Data Analysis Specialist for AutoSentry AI.
-Your role is to analyze vehicle telemetry data, identify patterns, detect anomalies,
-and provide insights for predictive maintenance. Focus on sensor data interpretation.""",
-            
-            AgentType.DIAGNOSIS: """You are a Vehicle Diagnostics Expert for AutoSentry AI.
-Your role is to diagnose vehicle issues based on telemetry data and analysis results.
-Determine root causes and severity of problems. Provide technical recommendations.""",
-            
-            AgentType.CUSTOMER_ENGAGEMENT: """You are a Customer Success Manager for AutoSentry AI.
-Your role is to communicate with customers about vehicle maintenance needs.
-Be empathetic, clear, and helpful. Generate appropriate messages for chat and voice.""",
-            
-            AgentType.SCHEDULING: """You are a Service Scheduling Coordinator for AutoSentry AI.
-Your role is to schedule service appointments based on diagnosis priority and customer availability.
-Optimize scheduling for minimal customer disruption.""",
-            
-            AgentType.FEEDBACK: """You are a Customer Feedback Analyst for AutoSentry AI.
-Your role is to collect, analyze, and act on customer feedback.
-Identify trends and areas for improvement.""",
-            
-            AgentType.RCA_CAPA: """You are a Quality Engineer for AutoSentry AI.
-Your role is to perform Root Cause Analysis (RCA) and develop
-Corrective and Preventive Actions (CAPA) for manufacturing insights."""
-        }
-        
-        system_message = system_messages.get(
-            agent_type,
-            "You are an AI assistant for vehicle maintenance."
-        )
+        system_message = _SYSTEM_MESSAGES.get(agent_type, _DEFAULT_SYSTEM_MESSAGE)
         
         try:
-            autogen_agent = AssistantAgent(
-                name=agent_id.replace("-", "_"),
+            autogen_agent = autogen.AssistantAgent(
+                name=_normalize_agent_name(agent_id),
                 system_message=system_message,
                 llm_config=self.llm_config if self.llm_config else False
             )
@@ -146,14 +373,18 @@ Corrective and Preventive Actions (CAPA) for manufacturing insights."""
             self.agents[agent_id] = {
                 "autogen_agent": autogen_agent,
                 "type": agent_type,
+                "system_message": system_message,
                 "config": config
             }
+            if agent_id not in self._type_index[agent_type]:
+                self._type_index[agent_type].append(agent_id)
+            self._route_cache.clear()
             
-            logger.info(f"Created AutoGen agent: {agent_id} ({agent_type.value})")
+            logger.info("Created AutoGen agent: %s (%s)", agent_id, AGENT_TYPE_VALUES[agent_type])
             return autogen_agent
             
-        except Exception as e:
-            logger.error(f"Failed to create AutoGen agent: {e}")
+        except Exception:
+            logger.exception("Failed to create AutoGen agent")
             return None
     
     def execute_task(
@@ -179,88 +410,200 @@ Corrective and Preventive Actions (CAPA) for manufacturing insights."""
         
         try:
             autogen_agent = agent_data["autogen_agent"]
+            task_message = self._format_task_message(task)
             
-            # Format task message
-            task_message = f"""
-Task: {task.task_type}
-Description: {task.description}
-Input Data: {task.input_data}
-
-Please analyze and provide structured output.
-"""
+            # Short-circuit identical prompts
+            cache_key = self._prompt_cache_key(agent_data, task_message)
+            cached_result = self._get_cached_result(cache_key, agent_id, task, start_time)
+            if cached_result:
+                return cached_result
             
             # Initiate chat (non-interactive)
-            self.user_proxy.initiate_chat(
-                autogen_agent,
-                message=task_message,
-                max_turns=2
-            )
+            try:
+                self.user_proxy.initiate_chat(
+                    autogen_agent,
+                    message=task_message,
+                    max_turns=2
+                )
+                result = self._build_chat_result(agent_id, task, autogen_agent, start_time)
+            finally:
+                self._reset_chat_history(autogen_agent)
             
-            # Get last message as result
-            messages = autogen_agent.chat_messages.get(self.user_proxy, [])
-            last_message = messages[-1] if messages else {"content": "No response"}
-            
-            execution_time = (time.time() - start_time) * 1000
+            self._cache_result(cache_key, result)
+            return result
             
+        except Exception:
+            logger.exception("AutoGen execution error")
+            return self._fallback_execute(agent_id, task, start_time)
+    
+    async def aexecute_task(
+        self,
+        agent_id: str,
+        task: AgentTask
+    ) -> AgentResult:
+        """Execute a task using AutoGen's async chat API"""
+        start_time = time.time()
+        
+        agent_data = self.agents.get(agent_id)
+        if not agent_data:
             return AgentResult(
                 task_id=task.task_id,
                 agent_id=agent_id,
-                success=True,
-                output={
-                    "response": last_message.get("content", ""),
-                    "message_count": len(messages)
-                },
-                execution_time_ms=execution_time,
-                metadata={"framework": "autogen"}
+                success=False,
+                output={},
+                error=f"Agent {agent_id} not found"
             )
+        
+        if not AUTOGEN_AVAILABLE or not self.user_proxy:
+            return self._fallback_execute(agent_id, task, start_time)
+        
+        try:
+            autogen_agent = agent_data["autogen_agent"]
+            task_message = self._format_task_message(task)
             
-        except Exception as e:
-            logger.error(f"AutoGen execution error: {e}")
+            # Short-circuit identical prompts
+            cache_key = self._prompt_cache_key(agent_data, task_message)
+            cached_result = self._get_cached_result(cache_key, agent_id, task, start_time)
+            if cached_result:
+                return cached_result
+            
+            async with self._semaphore:
+                try:
+                    await self.user_proxy.a_initiate_chat(
+                        autogen_agent,
+                        message=task_message,
+                        max_turns=2
+                    )
+                    result = self._build_chat_result(agent_id, task, autogen_agent, start_time)
+                finally:
+                    self._reset_chat_history(autogen_agent)
+            
+            self._cache_result(cache_key, result)
+            return result
+            
+        except Exception:
+            logger.exception("AutoGen async execution error")
             return self._fallback_execute(agent_id, task, start_time)
     
-    def _fallback_execute(
+    def _format_task_message(self, task: AgentTask) -> str:
+        """Format an AgentTask as an AutoGen chat message"""
+        # Static instruction first so the prompt prefix stays cacheable
+        return f"""Please analyze and provide structured output.
+
+Task: {task.task_type}
+Description: {task.description}
+Input Data: {task.input_json()}
+"""
+    
+    def _reset_chat_history(self, autogen_agent: Any):
+        """Drop per-chat history so agents don't accumulate messages across tasks"""
+        autogen_agent.chat_messages.get(self.user_proxy, []).clear()
+        self.user_proxy.chat_messages.get(autogen_agent, []).clear()
+    
+    def _prompt_cache_key(self, agent_data: Dict[str, Any], task_message: str) -> Optional[str]:
+        """Compute the prompt cache key, or None if caching is disabled"""
+        if not self.prompt_cache:
+            return None
+        
+        model = self.llm_config["config_list"][0]["model"] if self.llm_config else ""
+        return PromptCache.make_key(model, agent_data.get("system_message", ""), task_message)
+    
+    def _get_cached_result(
         self,
+        cache_key: Optional[str],
         agent_id: str,
         task: AgentTask,
         start_time: float
+    ) -> Optional[AgentResult]:
+        """Return a result built from the prompt cache on hit"""
+        if not cache_key:
+            return None
+        
+        response_text = self.prompt_cache.get(cache_key)
+        if response_text is None:
+            return None
+        
+        return AgentResult(
+            task_id=task.task_id,
+            agent_id=agent_id,
+            success=True,
+            output={
+                "response": response_text,
+                "cached": True
+            },
+            execution_time_ms=(time.time() - start_time) * 1000,
+            metadata={"framework": "autogen", "cache_hit": True}
+        )
+    
+    def _cache_result(self, cache_key: Optional[str], result: AgentResult):
+        """Store a successful chat response in the prompt cache"""
+        if not cache_key or not result.success:
+            return
+        
+        model = self.llm_config["config_list"][0]["model"] if self.llm_config else ""
+        self.prompt_cache.put(
+            cache_key,
+            model,
+            result.output.get("response", ""),
+            latency_ms=result.execution_time_ms
+        )
+    
+    def _build_chat_result(
+        self,
+        agent_id: str,
+        task: AgentTask,
+        autogen_agent: Any,
+        start_time: float
+    ) -> AgentResult:
+        """Build an AgentResult from the last message of a finished chat"""
+        # Get last message as result
+        messages = autogen_agent.chat_messages.get(self.user_proxy, [])
+        last_message = messages[-1] if messages else {"content": "No response"}
+        
+        execution_time = (time.time() - start_time) * 1000
+        
+        return AgentResult(
+            task_id=task.task_id,
+            agent_id=agent_id,
+            success=True,
+            output={
+                "response": last_message.get("content", ""),
+                "message_count": len(messages)
+            },
+            execution_time_ms=execution_time,
+            metadata={"framework": "autogen"}
+        )
+    
+    def _fallback_execute(
+        self,
+        agent_id: str,
+        task: AgentTask,
+        start_time: float,
+        timestamp: Optional[str] = None
     ) -> AgentResult:
-        """Fallback execution without AutoGen LLM"""
+        """
+        Fallback execution without AutoGen LLM.
+        
+        Batch callers pass a precomputed timestamp shared by all tasks;
+        otherwise it is derived from start_time.
+        """
         agent_data = self.agents.get(agent_id, {})
         agent_type = agent_data.get("type", AgentType.MASTER)
         
-        # Generate appropriate response based on agent type
-        responses = {
-            AgentType.DATA_ANALYSIS: {
-                "analysis": "Data analysis complete",
-                "patterns_detected": ["normal_operation"],
-                "anomalies": []
-            },
-            AgentType.DIAGNOSIS: {
-                "diagnosis": "No critical issues found",
-                "recommendations": ["Continue regular maintenance"]
-            },
-            AgentType.CUSTOMER_ENGAGEMENT: {
-                "message": "Thank you for using AutoSentry AI. Your vehicle is in good condition.",
-                "channel": "chat"
-            },
-            AgentType.SCHEDULING: {
-                "appointment_id": f"APT-{uuid.uuid4().hex[:8].upper()}",
-                "status": "available"
-            },
-            AgentType.FEEDBACK: {
-                "survey_sent": True,
-                "feedback_id": f"FB-{uuid.uuid4().hex[:8].upper()}"
-            },
-            AgentType.RCA_CAPA: {
-                "rca_complete": True,
-                "capa_id": f"CAPA-{uuid.uuid4().hex[:8].upper()}"
-            }
+        # Copy the template for this agent type; tuples become fresh lists
+        template = _FALLBACK_RESPONSES.get(agent_type, _DEFAULT_FALLBACK_RESPONSE)
+        output = {
+            key: list(value) if isinstance(value, tuple) else value
+            for key, value in template.items()
         }
         
-        output = responses.get(agent_type, {"status": "completed"})
+        id_field = _FALLBACK_ID_FIELDS.get(agent_type)
+        if id_field:
+            output[id_field[0]] = short_id(id_field[1])
+        
         output["task_id"] = task.task_id
         output["framework"] = "autogen_fallback"
-        output["timestamp"] = datetime.now().isoformat()
+        output["timestamp"] = timestamp or datetime.fromtimestamp(start_time).isoformat()
         
         execution_time = (time.time() - start_time) * 1000
         
@@ -279,31 +622,246 @@ Please analyze and provide structured output.
         workflow_config: Dict[str, Any] = None
     ) -> List[AgentResult]:
         """Orchestrate workflow using AutoGen group chat"""
+        return list(self.stream_workflow(tasks, workflow_config))
+    
+    def stream_workflow(
+        self,
+        tasks: List[AgentTask],
+        workflow_config: Dict[str, Any] = None
+    ) -> Iterator[AgentResult]:
+        """
+        Orchestrate workflow, yielding each result as soon as it is ready.
+        
+        Priority tiers still run in order; within a tier results come back
+        in completion order.
+        """
         if not AUTOGEN_AVAILABLE or not self.autogen_agents:
-            return self._fallback_orchestrate(tasks, workflow_config)
+            yield from self._fallback_orchestrate(tasks, workflow_config)
+            return
         
         workflow_config = workflow_config or {}
+        
+        # Batch API is opt-in: it trades latency for cost and throughput
+        use_batch = bool(self.config.get("llm_api_key")) and workflow_config.get(
+            "use_batch_api", self.config.get("use_batch_api", False)
+        )
+        batch_min_size = self.config.get("batch_min_size", 4)
+        
+        # Resolve task -> agent once, before dispatch
+        assignments = self._assign_agents(tasks)
+        
+        # Execute priority tiers sequentially with group coordination
+        for _, tier in groupby(assignments, key=lambda a: a[1].priority):
+            tier = list(tier)
+            
+            if use_batch and len(tier) >= batch_min_size:
+                try:
+                    batch_results = self._submit_batch(tier)
+                except Exception:
+                    logger.exception("AutoGen batch submission error")
+                else:
+                    yield from batch_results
+                    continue
+            
+            yield from self._stream_tier(tier)
+    
+    def _stream_tier(self, tier: List[Tuple[Optional[str], AgentTask]]) -> Iterator[AgentResult]:
+        """
+        Execute one priority tier, yielding results in completion order.
+        
+        Each agent's tasks run one at a time (the agent's chat history is
+        not safe to share), while different agents run concurrently.
+        """
+        runs: Dict[Optional[str], Deque[AgentTask]] = defaultdict(deque)
+        for agent_id, task in tier:
+            runs[agent_id].append(task)
+        
+        if len(runs) == 1:
+            agent_id, agent_tasks = next(iter(runs.items()))
+            for task in agent_tasks:
+                yield self._execute_assigned(agent_id, task)
+            return
+        
+        pending: Dict[Future, Optional[str]] = {}
+        
+        def submit(agent_id: Optional[str]):
+            task = runs[agent_id].popleft()
+            pending[self.executor.submit(self._execute_assigned, agent_id, task)] = agent_id
+        
+        for agent_id in runs:
+            submit(agent_id)
+        
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                agent_id = pending.pop(future)
+                if runs[agent_id]:
+                    submit(agent_id)
+                yield future.result()
+    
+    def _assign_agents(self, tasks: List[AgentTask]) -> List[Tuple[Optional[str], AgentTask]]:
+        """Pair each task with its agent, in priority order"""
+        return [
+            (self._select_agent_for_task(task), task)
+            for task in sort_tasks_by_priority(tasks)
+        ]
+    
+    def _no_agent_result(self, task: AgentTask) -> AgentResult:
+        """Result for a task that has no suitable agent"""
+        return AgentResult(
+            task_id=task.task_id,
+            agent_id="none",
+            success=False,
+            output={},
+            error="No suitable agent found"
+        )
+    
+    def _execute_assigned(self, agent_id: Optional[str], task: AgentTask) -> AgentResult:
+        """Execute a task on its assigned agent"""
+        if not agent_id:
+            return self._no_agent_result(task)
+        
+        return self.execute_task(agent_id, task)
+    
+    def _submit_batch(self, assignments: List[Tuple[str, AgentTask]]) -> List[AgentResult]:
+        """
+        Execute a group of tasks as a single OpenAI Batch API job.
+        
+        Each task becomes one chat completion request; results are mapped
+        back to tasks through the request custom_id.
+        """
+        from openai import OpenAI
+        
+        start_time = time.time()
+        client = OpenAI(api_key=self.config["llm_api_key"])
+        model = self.llm_config["config_list"][0]["model"]
+        
+        task_agents = {}
+        lines = []
+        for agent_id, task in assignments:
+            task_agents[task.task_id] = agent_id
+            lines.append(json.dumps({
+                "custom_id": task.task_id,
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": {
+                    "model": model,
+                    "temperature": self.llm_config.get("temperature", 0.1),
+                    "messages": [
+                        {"role": "system", "content": self.agents[agent_id].get("system_message", "")},
+                        {"role": "user", "content": self._format_task_message(task)}
+                    ]
+                }
+            }))
+        
+        batch_file = client.files.create(
+            file=("autosentry_batch.jsonl", "\n".join(lines).encode()),
+            purpose="batch"
+        )
+        batch = client.batches.create(
+            input_file_id=batch_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h"
+        )
+        logger.info("Submitted AutoGen batch %s with %d tasks", batch.id, len(assignments))
+        
+        # Poll with exponential backoff, giving up well before the 24h window
+        # so the caller isn't blocked and the tier can fall back to chats
+        delay = self.config.get("batch_poll_interval", 1.0)
+        max_delay = self.config.get("batch_poll_max_interval", 60.0)
+        deadline = time.monotonic() + self.config.get("batch_timeout", 600.0)
+        while batch.status not in ("completed", "failed", "expired", "cancelled"):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                try:
+                    client.batches.cancel(batch.id)
+                except Exception:
+                    logger.exception("Failed to cancel AutoGen batch %s", batch.id)
+                raise TimeoutError(f"Batch {batch.id} still {batch.status} after batch_timeout")
+            time.sleep(min(delay, remaining))
+            delay = min(delay * 2, max_delay)
+            batch = client.batches.retrieve(batch.id)
+        
+        if batch.status != "completed" or not batch.output_file_id:
+            raise RuntimeError(f"Batch {batch.id} ended with status {batch.status}")
+        
+        responses = {}
+        for line in client.files.content(batch.output_file_id).text.splitlines():
+            if line.strip():
+                record = json.loads(line)
+                responses[record["custom_id"]] = record
+        
+        execution_time = (time.time() - start_time) * 1000
         results = []
         
-        # Execute tasks sequentially with group coordination
-        for task in sorted(tasks, key=lambda t: t.priority):
-            # Find appropriate agent
-            agent_id = self._select_agent_for_task(task)
+        for _, task in assignments:
+            record = responses.get(task.task_id) or {}
+            response = record.get("response") or {}
             
-            if agent_id:
-                result = self.execute_task(agent_id, task)
-                results.append(result)
-            else:
+            if record.get("error") or response.get("status_code") != 200:
                 results.append(AgentResult(
                     task_id=task.task_id,
-                    agent_id="none",
+                    agent_id=task_agents[task.task_id],
                     success=False,
                     output={},
-                    error="No suitable agent found"
+                    error=str(record.get("error") or "No batch response"),
+                    execution_time_ms=execution_time,
+                    metadata={"framework": "autogen", "batch_id": batch.id}
                 ))
+                continue
+            
+            choices = response["body"].get("choices", [])
+            results.append(AgentResult(
+                task_id=task.task_id,
+                agent_id=task_agents[task.task_id],
+                success=True,
+                output={"response": choices[0]["message"]["content"] if choices else ""},
+                execution_time_ms=execution_time,
+                metadata={"framework": "autogen", "batch_id": batch.id}
+            ))
         
         return results
     
+    async def aorchestrate_workflow(
+        self,
+        tasks: List[AgentTask],
+        workflow_config: Dict[str, Any] = None
+    ) -> List[AgentResult]:
+        """
+        Orchestrate workflow concurrently.
+        
+        Priority tiers run in order. Within a tier each agent's tasks run
+        one at a time (the agent's chat history is not safe to share), while
+        different agents are dispatched together with asyncio.gather.
+        """
+        if not AUTOGEN_AVAILABLE or not self.autogen_agents:
+            return self._fallback_orchestrate(tasks, workflow_config)
+        
+        results = []
+        
+        for _, tier in groupby(self._assign_agents(tasks), key=lambda a: a[1].priority):
+            runs: Dict[Optional[str], List[Tuple[int, AgentTask]]] = defaultdict(list)
+            for position, (agent_id, task) in enumerate(tier):
+                runs[agent_id].append((position, task))
+            
+            tier_results: List[Optional[AgentResult]] = [None] * sum(map(len, runs.values()))
+            
+            async def run_agent(agent_id: Optional[str], assigned: List[Tuple[int, AgentTask]]):
+                for position, task in assigned:
+                    tier_results[position] = await self._aexecute_assigned(agent_id, task)
+            
+            await asyncio.gather(*[run_agent(agent_id, assigned) for agent_id, assigned in runs.items()])
+            results.extend(tier_results)
+        
+        return results
+    
+    async def _aexecute_assigned(self, agent_id: Optional[str], task: AgentTask) -> AgentResult:
+        """Execute a task on its assigned agent asynchronously"""
+        if not agent_id:
+            return self._no_agent_result(task)
+        
+        return await self.aexecute_task(agent_id, task)
+    
     def _fallback_orchestrate(
         self,
         tasks: List[AgentTask],
@@ -311,32 +869,27 @@ Please analyze and provide structured output.
     ) -> List[AgentResult]:
         """Fallback orchestration"""
         results = []
+        timestamp = datetime.now().isoformat()
+        agent_id = next(iter(self.agents), "default")
         
-        for task in sorted(tasks, key=lambda t: t.priority):
-            agent_id = list(self.agents.keys())[0] if self.agents else "default"
-            result = self._fallback_execute(agent_id, task, time.time())
+        for task in sort_tasks_by_priority(tasks):
+            result = self._fallback_execute(agent_id, task, time.time(), timestamp)
             results.append(result)
         
         return results
     
     def _select_agent_for_task(self, task: AgentTask) -> Optional[str]:
         """Select appropriate AutoGen agent for task"""
-        task_type_mapping = {
-            "analyze": AgentType.DATA_ANALYSIS,
-            "diagnose": AgentType.DIAGNOSIS,
-            "engage": AgentType.CUSTOMER_ENGAGEMENT,
-            "schedule": AgentType.SCHEDULING,
-            "feedback": AgentType.FEEDBACK,
-            "rca_capa": AgentType.RCA_CAPA
-        }
-        
-        target_type = task_type_mapping.get(task.task_type)
+        try:
+            return self._route_cache[task.task_type]
+        except KeyError:
+            pass
         
-        for agent_id, agent_data in self.agents.items():
-            if agent_data.get("type") == target_type:
-                return agent_id
+        agent_ids = self._type_index.get(TASK_TYPE_MAPPING.get(task.task_type))
+        agent_id = agent_ids[0] if agent_ids else next(iter(self.agents), None)
         
-        return list(self.agents.keys())[0] if self.agents else None
+        self._route_cache[task.task_type] = agent_id
+        return agent_id
     
     def create_group_chat(
         self,
@@ -345,7 +898,7 @@ Please analyze and provide structured output.
         max_round: int = 10
     ):
         """Create a group chat with multiple agents"""
-        if not AUTOGEN_AVAILABLE:
+        if not _load_autogen():
             logger.error("AutoGen not available")
             return None
         
@@ -358,17 +911,28 @@ Please analyze and provide structured output.
         # Add user proxy
         agents.append(self.user_proxy)
         
-        group_chat = GroupChat(
+        group_chat = autogen.GroupChat(
             agents=agents,
             messages=[],
             max_round=max_round
         )
         
-        manager = GroupChatManager(
+        manager = autogen.GroupChatManager(
             groupchat=group_chat,
             llm_config=self.llm_config
         )
         
-        logger.info(f"Created group chat: {group_id} with {len(agents)} agents")
+        logger.info("Created group chat: %s with %d agents", group_id, len(agents))
         
         return manager
+    
+    def shutdown(self):
+        """Cleanup and shutdown"""
+        super().shutdown()
+        self._type_index.clear()
+        self._route_cache.clear()
+        self.executor.shutdown(wait=True)
+        
+        if self.prompt_cache:
+            self.prompt_cache.close()
+            self.prompt_cache = None
@@ -4,13 +4,93 @@ Abstract base class for agent framework adapters
 """
 
 from abc import ABC, abstractmethod
-from typing import Dict, Any, List, Optional, Callable
-from dataclasses import dataclass
+from typing import Dict, Any, List, Optional, Callable, Deque, FrozenSet, Mapping
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime
 from enum import Enum
+from types import MappingProxyType
+import asyncio
+import json
 import logging
+import os
+import threading
+import time
 
 logger = logging.getLogger(__name__)
 
+# Optional NumPy fast paths
+NUMPY_AVAILABLE = False
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    pass
+
+# Optional fast JSON serialization
+ORJSON_AVAILABLE = False
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    pass
+
+# Below this many tasks NumPy's fixed overhead outweighs the sort savings
+_NUMPY_SORT_THRESHOLD = 64
+
+# Pool of random 8-hex-char tokens for short IDs
+_ID_POOL_BLOCK = 256
+_id_pool: Deque[str] = deque()
+_id_pool_lock = threading.Lock()
+
+# Forked workers must not hand out the parent's remaining tokens
+# (fork hooks are Unix-only; Windows has no fork)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_id_pool.clear)
+
+
+def _refill_id_pool():
+    """Refill the token pool from a single os.urandom call"""
+    with _id_pool_lock:
+        if _id_pool:
+            return
+        block = os.urandom(4 * _ID_POOL_BLOCK).hex().upper()
+        _id_pool.extend(block[i:i + 8] for i in range(0, len(block), 8))
+
+
+def short_id(prefix: str) -> str:
+    """
+    Generate a short random ID such as "APT-1A2B3C4D".
+    
+    Equivalent to f"{prefix}-{uuid.uuid4().hex[:8].upper()}", but draws
+    randomness in blocks so bulk ID generation avoids a syscall per ID.
+    """
+    while True:
+        try:
+            return f"{prefix}-{_id_pool.popleft()}"
+        except IndexError:
+            _refill_id_pool()
+
+
+# (epoch second, local ISO string for that second) behind iso_now
+_iso_second = (None, "")
+
+
+def iso_now() -> str:
+    """
+    Current local time as an ISO 8601 string with microseconds.
+    
+    Same format as datetime.now().isoformat(), but the date/time part is
+    formatted once per second and only the microseconds change per call.
+    """
+    global _iso_second
+    second, nanos = divmod(time.time_ns(), 1_000_000_000)
+    cached_second, prefix = _iso_second
+    if second != cached_second:
+        prefix = datetime.fromtimestamp(second).isoformat()
+        _iso_second = (second, prefix)
+    return f"{prefix}.{nanos // 1000:06d}"
+
 
 class AgentType(Enum):
     """Types of agents in the system"""
@@ -23,6 +103,11 @@ class AgentType(Enum):
     RCA_CAPA = "rca_capa"
 
 
+# AgentType -> value string, for hot paths that would otherwise go through
+# the Enum descriptor on every access
+AGENT_TYPE_VALUES: Mapping[AgentType, str] = MappingProxyType({t: t.value for t in AgentType})
+
+
 class ActionType(Enum):
     """Types of agent actions"""
     QUERY = "query"
@@ -36,7 +121,7 @@ class ActionType(Enum):
     ENGAGE = "engage"
 
 
-@dataclass
+@dataclass(slots=True)
 class AgentTask:
     """Represents a task for an agent to execute"""
     task_id: str
@@ -47,11 +132,35 @@ class AgentTask:
     timeout_seconds: int = 30
     retry_count: int = 0
     max_retries: int = 3
+    # "<task_type>_result" keys this task consumes when workflow outputs are
+    # chained; None accepts every upstream result
+    expected_inputs: Optional[FrozenSet[str]] = None
+    _input_json: Optional[str] = field(default=None, init=False, repr=False, compare=False)
+    
+    def input_json(self) -> str:
+        """
+        Compact, key-sorted JSON of input_data.
+        
+        Serialized on first call and reused afterwards (e.g. across retries),
+        so callers must not mutate input_data once a prompt has been built.
+        """
+        if self._input_json is None:
+            if ORJSON_AVAILABLE:
+                self._input_json = orjson.dumps(
+                    self.input_data,
+                    default=str,
+                    option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS
+                ).decode()
+            else:
+                self._input_json = json.dumps(
+                    self.input_data, default=str, sort_keys=True, separators=(",", ":")
+                )
+        return self._input_json
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class AgentResult:
-    """Result from an agent task execution"""
+    """Result from an agent task execution (immutable, safe to share)"""
     task_id: str
     agent_id: str
     success: bool
@@ -61,6 +170,20 @@ class AgentResult:
     metadata: Optional[Dict[str, Any]] = None
 
 
+def sort_tasks_by_priority(tasks: List[AgentTask]) -> List[AgentTask]:
+    """
+    Stable sort of tasks by priority (1 = highest).
+    
+    Large task lists are sorted with a NumPy argsort over the extracted
+    priorities instead of calling a key lambda per element.
+    """
+    if not NUMPY_AVAILABLE or len(tasks) < _NUMPY_SORT_THRESHOLD:
+        return sorted(tasks, key=lambda t: t.priority)
+    
+    priorities = np.fromiter((t.priority for t in tasks), dtype=np.int32, count=len(tasks))
+    return [tasks[i] for i in np.argsort(priorities, kind="stable")]
+
+
 class BaseAgentAdapter(ABC):
     """
     Abstract base class for agent framework adapters.
@@ -69,11 +192,13 @@ class BaseAgentAdapter(ABC):
     (LangGraph, CrewAI, AutoGen) with the AutoSentry system.
     """
     
+    __slots__ = ("config", "agents", "is_initialized")
+    
     def __init__(self, config: Dict[str, Any] = None):
         self.config = config or {}
         self.agents: Dict[str, Any] = {}
         self.is_initialized = False
-        logger.info(f"Initializing {self.__class__.__name__}")
+        logger.info("Initializing %s", self.__class__.__name__)
     
     @abstractmethod
     def initialize(self) -> bool:
@@ -143,6 +268,46 @@ class BaseAgentAdapter(ABC):
         """
         pass
     
+    async def aexecute_task(
+        self,
+        agent_id: str,
+        task: AgentTask
+    ) -> AgentResult:
+        """
+        Execute a task without blocking the event loop.
+        
+        The default runs execute_task in a worker thread; adapters with a
+        native async path override this.
+        
+        Args:
+            agent_id: ID of the agent to execute the task
+            task: Task to execute
+            
+        Returns:
+            AgentResult with the execution results
+        """
+        return await asyncio.to_thread(self.execute_task, agent_id, task)
+    
+    async def aorchestrate_workflow(
+        self,
+        tasks: List[AgentTask],
+        workflow_config: Dict[str, Any] = None
+    ) -> List[AgentResult]:
+        """
+        Orchestrate a workflow without blocking the event loop.
+        
+        The default runs orchestrate_workflow in a worker thread; adapters
+        with a native async path override this.
+        
+        Args:
+            tasks: List of tasks to execute
+            workflow_config: Configuration for the workflow
+            
+        Returns:
+            List of AgentResults from all tasks
+        """
+        return await asyncio.to_thread(self.orchestrate_workflow, tasks, workflow_config)
+    
     def get_agent(self, agent_id: str) -> Optional[Any]:
         """Get an agent by ID"""
         return self.agents.get(agent_id)
@@ -153,7 +318,7 @@ class BaseAgentAdapter(ABC):
     
     def shutdown(self):
         """Cleanup and shutdown the framework"""
-        logger.info(f"Shutting down {self.__class__.__name__}")
+        logger.info("Shutting down %s", self.__class__.__name__)
         self.agents.clear()
         self.is_initialized = False
 
@@ -163,15 +328,18 @@ class AgentToolRegistry:
     
     def __init__(self):
         self.tools: Dict[str, Callable] = {}
+        # name -> function view, rebuilt lazily after register
+        self._all_cache: Optional[Mapping[str, Callable]] = None
     
     def register(self, name: str, func: Callable, description: str = ""):
         """Register a tool function"""
+        self._all_cache = None
         self.tools[name] = {
             "function": func,
             "description": description,
             "name": name
         }
-        logger.debug(f"Registered tool: {name}")
+        logger.debug("Registered tool: %s", name)
     
     def get(self, name: str) -> Optional[Dict]:
         """Get a tool by name"""
@@ -181,9 +349,13 @@ class AgentToolRegistry:
         """List all registered tool names"""
         return list(self.tools.keys())
     
-    def get_all(self) -> Dict[str, Callable]:
-        """Get all registered tools"""
-        return {name: info["function"] for name, info in self.tools.items()}
+    def get_all(self) -> Mapping[str, Callable]:
+        """Get all registered tools (read-only view)"""
+        if self._all_cache is None:
+            self._all_cache = MappingProxyType(
+                {name: info["function"] for name, info in self.tools.items()}
+            )
+        return self._all_cache
 
 
 # Global tool registry
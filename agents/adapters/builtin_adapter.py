@@ -3,24 +3,99 @@ AutoSentry AI - Built-in Agent Framework Adapter
 Lightweight custom orchestrator for agent management
 """
 
-from typing import Dict, Any, List, Callable, Optional
+from typing import Dict, Any, List, Callable, ClassVar, Deque, Optional, Tuple
+from collections import defaultdict, deque
+from itertools import groupby
+from types import MappingProxyType
 import asyncio
 import logging
+import os
+import threading
 import time
-import uuid
-from datetime import datetime
 from concurrent.futures import ThreadPoolExecutor
 
 from .base_adapter import (
-    BaseAgentAdapter, AgentType, AgentTask, AgentResult, ActionType
+    BaseAgentAdapter, AgentType, AgentTask, AgentResult, ActionType,
+    AGENT_TYPE_VALUES, short_id, iso_now, sort_tasks_by_priority
 )
 
 logger = logging.getLogger(__name__)
 
+# Optional NumPy fast path for fleet-wide analysis
+NUMPY_AVAILABLE = False
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    pass
+
+# Below this many vehicles the per-vehicle Python checks are faster
+_NUMPY_FLEET_THRESHOLD = 64
+
+
+# Engagement message templates, filled with str.format_map in _engage
+_URGENCY_HIGH = "We recommend scheduling as soon as possible."
+_URGENCY_LOW = "Please schedule at your earliest convenience."
+
+_CHAT_TEMPLATE = """
+Hello {name},
+
+Our predictive maintenance system has detected that your vehicle may need attention.
+
+Service Recommended: {service_type}
+Priority: {priority_title}
+
+{urgency}
+
+Would you like to schedule a service appointment? 
+Reply 'BOOK' to schedule or call us at 1-800-AUTOSENTRY.
+
+Best regards,
+AutoSentry AI Team
+""".strip()
+
+_VOICE_TEMPLATE = """
+Hello, this is AutoSentry AI calling about your vehicle.
+Our system has detected that your vehicle may need {service_type_lower}.
+This is marked as {priority} priority.
+{urgency}
+To schedule an appointment, press 1.
+To speak with a representative, press 2.
+To hear this message again, press 3.
+""".strip()
+
+_SMS_TEMPLATE = "AutoSentry Alert: Your vehicle needs {service_type}. Call 1-800-AUTOSENTRY to schedule."
+
+# Task type -> agent type that handles it
+_TASK_AGENT_TYPES = MappingProxyType({
+    "analyze": AgentType.DATA_ANALYSIS,
+    "diagnose": AgentType.DIAGNOSIS,
+    "predict": AgentType.DATA_ANALYSIS,
+    "schedule": AgentType.SCHEDULING,
+    "engage": AgentType.CUSTOMER_ENGAGEMENT,
+    "feedback": AgentType.FEEDBACK,
+    "rca_capa": AgentType.RCA_CAPA
+})
+
+# Feedback survey questions, copied into each _feedback output
+_FEEDBACK_QUESTIONS = (
+    MappingProxyType({"id": 1, "text": "How satisfied were you with the service?", "type": "rating"}),
+    MappingProxyType({"id": 2, "text": "Was the issue resolved?", "type": "yes_no"}),
+    MappingProxyType({"id": 3, "text": "How likely are you to recommend us?", "type": "nps"}),
+    MappingProxyType({"id": 4, "text": "Any additional comments?", "type": "text"})
+)
+
+# Recommended-action words that route an appointment to brake service
+_BRAKE_WORDS = frozenset(("brake", "brakes"))
 
 class BuiltinAgent:
     """Simple built-in agent implementation"""
     
+    __slots__ = (
+        "agent_id", "agent_type", "tools", "config", "state", "history",
+        "success_count", "failure_count", "_counts_lock", "_handlers"
+    )
+    
     def __init__(
         self,
         agent_id: str,
@@ -33,43 +108,48 @@ class BuiltinAgent:
         self.tools = tools or []
         self.config = config or {}
         self.state: Dict[str, Any] = {}
-        self.history: List[Dict] = []
+        # Rolling window of recent tasks; totals are kept in the counters
+        self.history: Deque[Dict] = deque(maxlen=self.config.get("history_size", 256))
+        self.success_count = 0
+        self.failure_count = 0
+        # Tasks for one agent can run concurrently on the shared executor
+        self._counts_lock = threading.Lock()
+        
+        # Task type -> handler, resolved once instead of per task
+        self._handlers: Dict[str, Callable[[Dict], Dict]] = {
+            "analyze": self._analyze,
+            "diagnose": self._diagnose,
+            "predict": self._predict,
+            "schedule": self._schedule,
+            "engage": self._engage,
+            "feedback": self._feedback,
+            "rca_capa": self._rca_capa
+        }
         
     def execute(self, task: AgentTask) -> AgentResult:
         """Execute a task"""
-        start_time = time.time()
+        now = time.time
+        start_time = now()
         
         try:
             # Log task start
-            logger.info(f"Agent {self.agent_id} executing task: {task.task_type}")
+            logger.info("Agent %s executing task: %s", self.agent_id, task.task_type)
             
             # Execute based on task type
-            if task.task_type == "analyze":
-                output = self._analyze(task.input_data)
-            elif task.task_type == "diagnose":
-                output = self._diagnose(task.input_data)
-            elif task.task_type == "predict":
-                output = self._predict(task.input_data)
-            elif task.task_type == "schedule":
-                output = self._schedule(task.input_data)
-            elif task.task_type == "engage":
-                output = self._engage(task.input_data)
-            elif task.task_type == "feedback":
-                output = self._feedback(task.input_data)
-            elif task.task_type == "rca_capa":
-                output = self._rca_capa(task.input_data)
-            else:
-                output = self._generic_task(task.input_data)
+            handler = self._handlers.get(task.task_type, self._generic_task)
+            output = handler(task.input_data)
             
-            execution_time = (time.time() - start_time) * 1000
+            execution_time = (now() - start_time) * 1000
             
             # Store in history
             self.history.append({
                 "task_id": task.task_id,
                 "task_type": task.task_type,
-                "timestamp": datetime.now().isoformat(),
+                "timestamp": iso_now(),
                 "success": True
             })
+            with self._counts_lock:
+                self.success_count += 1
             
             return AgentResult(
                 task_id=task.task_id,
@@ -80,8 +160,10 @@ class BuiltinAgent:
             )
             
         except Exception as e:
-            execution_time = (time.time() - start_time) * 1000
-            logger.error(f"Agent {self.agent_id} task failed: {e}")
+            execution_time = (now() - start_time) * 1000
+            logger.error("Agent %s task failed: %s", self.agent_id, e)
+            with self._counts_lock:
+                self.failure_count += 1
             
             return AgentResult(
                 task_id=task.task_id,
@@ -94,16 +176,36 @@ class BuiltinAgent:
     
     def _analyze(self, data: Dict) -> Dict:
         """Data analysis task"""
-        telemetry = data.get("telemetry", {})
-        
+        return self.analyze_telemetry(data.get("telemetry", {}))
+    
+    @staticmethod
+    def analyze_telemetry(telemetry: Dict) -> Dict:
+        """Check one vehicle's telemetry against the health thresholds"""
         # Simple analysis logic
+        return BuiltinAgent.build_analysis(
+            telemetry.get("vehicle_id", "unknown"),
+            engine_ok=telemetry.get("engine_temp", 90) < 100,
+            oil_ok=telemetry.get("oil_pressure", 40) > 30,
+            battery_ok=telemetry.get("battery_voltage", 12) > 11.5,
+            brakes_ok=telemetry.get("brake_pad_wear_avg", 0.5) > 0.2
+        )
+    
+    @staticmethod
+    def build_analysis(
+        vehicle_id: str,
+        engine_ok: bool,
+        oil_ok: bool,
+        battery_ok: bool,
+        brakes_ok: bool
+    ) -> Dict:
+        """Build the analysis output from per-system health checks"""
         analysis = {
-            "vehicle_id": telemetry.get("vehicle_id", "unknown"),
+            "vehicle_id": vehicle_id,
             "health_indicators": {
-                "engine": "good" if telemetry.get("engine_temp", 90) < 100 else "warning",
-                "oil": "good" if telemetry.get("oil_pressure", 40) > 30 else "warning",
-                "battery": "good" if telemetry.get("battery_voltage", 12) > 11.5 else "warning",
-                "brakes": "good" if telemetry.get("brake_pad_wear_avg", 0.5) > 0.2 else "warning"
+                "engine": "good" if engine_ok else "warning",
+                "oil": "good" if oil_ok else "warning",
+                "battery": "good" if battery_ok else "warning",
+                "brakes": "good" if brakes_ok else "warning"
             },
             "overall_status": "healthy",
             "recommendations": []
@@ -123,7 +225,7 @@ class BuiltinAgent:
         
         diagnosis = {
             "vehicle_id": analysis.get("vehicle_id", "unknown"),
-            "diagnosis_code": f"DX-{uuid.uuid4().hex[:8].upper()}",
+            "diagnosis_code": short_id("DX"),
             "findings": [],
             "root_causes": [],
             "severity": "low",
@@ -166,7 +268,7 @@ class BuiltinAgent:
     def _predict(self, data: Dict) -> Dict:
         """Prediction task - would call ML service"""
         return {
-            "prediction_id": f"PRED-{uuid.uuid4().hex[:8].upper()}",
+            "prediction_id": short_id("PRED"),
             "status": "generated",
             "note": "Prediction would be fetched from ML service"
         }
@@ -177,7 +279,7 @@ class BuiltinAgent:
         customer = data.get("customer", {})
         
         appointment = {
-            "appointment_id": f"APT-{uuid.uuid4().hex[:8].upper()}",
+            "appointment_id": short_id("APT"),
             "vehicle_id": diagnosis.get("vehicle_id", "unknown"),
             "customer_name": customer.get("name", "Unknown"),
             "service_type": "Diagnostic Service",
@@ -186,12 +288,21 @@ class BuiltinAgent:
             "estimated_duration_hours": 2
         }
         
-        # Set service type based on diagnosis
-        if "brakes" in str(diagnosis.get("recommended_actions", [])).lower():
+        # Set service type based on diagnosis, most common first
+        action_words = {
+            word for action in diagnosis.get("recommended_actions") or []
+            for word in str(action).lower().split()
+        }
+        finding_words = {
+            word for finding in diagnosis.get("findings") or []
+            for word in str(finding).lower().split()
+        }
+        
+        if not _BRAKE_WORDS.isdisjoint(action_words):
             appointment["service_type"] = "Brake Service"
-        elif "engine" in str(diagnosis.get("findings", [])).lower():
+        elif "engine" in finding_words:
             appointment["service_type"] = "Engine Diagnostics"
-        elif "battery" in str(diagnosis.get("findings", [])).lower():
+        elif "battery" in finding_words:
             appointment["service_type"] = "Electrical Service"
         
         return appointment
@@ -205,59 +316,34 @@ class BuiltinAgent:
         service_type = appointment.get("service_type", "Service")
         priority = appointment.get("priority", "low")
         
-        if priority == "high":
-            urgency = "We recommend scheduling as soon as possible."
-        else:
-            urgency = "Please schedule at your earliest convenience."
-        
-        chat_message = f"""
-Hello {customer.get('name', 'Valued Customer')},
-
-Our predictive maintenance system has detected that your vehicle may need attention.
-
-Service Recommended: {service_type}
-Priority: {priority.title()}
-
-{urgency}
-
-Would you like to schedule a service appointment? 
-Reply 'BOOK' to schedule or call us at 1-800-AUTOSENTRY.
-
-Best regards,
-AutoSentry AI Team
-"""
-        
-        voice_script = f"""
-Hello, this is AutoSentry AI calling about your vehicle.
-Our system has detected that your vehicle may need {service_type.lower()}.
-This is marked as {priority} priority.
-{urgency}
-To schedule an appointment, press 1.
-To speak with a representative, press 2.
-To hear this message again, press 3.
-"""
+        params = {
+            "name": customer.get("name", "Valued Customer"),
+            "service_type": service_type,
+            "service_type_lower": service_type.lower(),
+            "priority": priority,
+            "priority_title": priority.title(),
+            "urgency": _URGENCY_HIGH if priority == "high" else _URGENCY_LOW
+        }
         
         return {
-            "engagement_id": f"ENG-{uuid.uuid4().hex[:8].upper()}",
+            "engagement_id": short_id("ENG"),
             "customer_id": customer.get("id", "unknown"),
             "channel": "multi",
-            "chat_message": chat_message.strip(),
-            "voice_script": voice_script.strip(),
-            "sms_message": f"AutoSentry Alert: Your vehicle needs {service_type}. Call 1-800-AUTOSENTRY to schedule.",
+            "chat_message": _CHAT_TEMPLATE.format_map(params),
+            "voice_script": _VOICE_TEMPLATE.format_map(params),
+            "sms_message": _SMS_TEMPLATE.format_map(params),
             "status": "prepared"
         }
     
     def _feedback(self, data: Dict) -> Dict:
         """Feedback collection task"""
+        feedback_id = short_id("FB")
+        
         return {
-            "feedback_id": f"FB-{uuid.uuid4().hex[:8].upper()}",
-            "survey_link": f"https://autosentry.ai/feedback/{uuid.uuid4().hex[:8]}",
-            "questions": [
-                {"id": 1, "text": "How satisfied were you with the service?", "type": "rating"},
-                {"id": 2, "text": "Was the issue resolved?", "type": "yes_no"},
-                {"id": 3, "text": "How likely are you to recommend us?", "type": "nps"},
-                {"id": 4, "text": "Any additional comments?", "type": "text"}
-            ],
+            "feedback_id": feedback_id,
+            "survey_link": f"https://autosentry.ai/feedback/{feedback_id[3:].lower()}",
+            # Fresh dicts: outputs must stay JSON-serializable and caller-owned
+            "questions": [dict(question) for question in _FEEDBACK_QUESTIONS],
             "status": "sent"
         }
     
@@ -267,15 +353,15 @@ To hear this message again, press 3.
         vehicle_data = data.get("vehicle_data", {})
         
         return {
-            "rca_id": f"RCA-{uuid.uuid4().hex[:8].upper()}",
-            "capa_id": f"CAPA-{uuid.uuid4().hex[:8].upper()}",
+            "rca_id": short_id("RCA"),
+            "capa_id": short_id("CAPA"),
             "component": diagnosis.get("findings", ["Unknown"])[0] if diagnosis.get("findings") else "Unknown",
             "root_cause": diagnosis.get("root_causes", ["Under investigation"])[0] if diagnosis.get("root_causes") else "Under investigation",
             "affected_vehicles": [vehicle_data.get("vehicle_id", "unknown")],
             "corrective_action": "Service and repair affected component",
             "preventive_action": "Implement predictive monitoring threshold",
             "status": "draft",
-            "created_at": datetime.now().isoformat()
+            "created_at": iso_now()
         }
     
     def _generic_task(self, data: Dict) -> Dict:
@@ -283,16 +369,41 @@ To hear this message again, press 3.
         return {
             "task_executed": True,
             "input_received": list(data.keys()),
-            "timestamp": datetime.now().isoformat()
+            "timestamp": iso_now()
         }
 
 
 class BuiltinAdapter(BaseAgentAdapter):
     """Built-in lightweight agent framework adapter"""
     
+    # Worker pool shared by every adapter that doesn't ask for its own
+    _shared_executor: ClassVar[Optional[ThreadPoolExecutor]] = None
+    _shared_executor_lock: ClassVar[threading.Lock] = threading.Lock()
+    
     def __init__(self, config: Dict[str, Any] = None):
         super().__init__(config)
-        self.executor = ThreadPoolExecutor(max_workers=10)
+        # Agent type -> agent IDs, maintained by create_agent
+        self._type_index: Dict[AgentType, List[str]] = defaultdict(list)
+        
+        # An explicit max_workers gets a private pool owned by this adapter
+        self._owns_executor = "max_workers" in self.config
+        if self._owns_executor:
+            self.executor = ThreadPoolExecutor(max_workers=self.config["max_workers"])
+        else:
+            self.executor = self._get_shared_executor()
+    
+    @classmethod
+    def _get_shared_executor(cls) -> ThreadPoolExecutor:
+        """Create the shared worker pool on first use"""
+        with cls._shared_executor_lock:
+            if cls._shared_executor is None:
+                max_workers = int(os.environ.get(
+                    "AUTOSENTRY_THREAD_POOL_SIZE", min(32, (os.cpu_count() or 1) * 4)
+                ))
+                cls._shared_executor = ThreadPoolExecutor(
+                    max_workers=max_workers, thread_name_prefix="autosentry-builtin"
+                )
+            return cls._shared_executor
     
     def initialize(self) -> bool:
         """Initialize the built-in framework"""
@@ -301,7 +412,7 @@ class BuiltinAdapter(BaseAgentAdapter):
             self.is_initialized = True
             return True
         except Exception as e:
-            logger.error(f"Failed to initialize: {e}")
+            logger.error("Failed to initialize: %s", e)
             return False
     
     def create_agent(
@@ -319,7 +430,9 @@ class BuiltinAdapter(BaseAgentAdapter):
             config=config
         )
         self.agents[agent_id] = agent
-        logger.info(f"Created agent: {agent_id} ({agent_type.value})")
+        if agent_id not in self._type_index[agent_type]:
+            self._type_index[agent_type].append(agent_id)
+        logger.info("Created agent: %s (%s)", agent_id, AGENT_TYPE_VALUES[agent_type])
         return agent
     
     def execute_task(
@@ -346,70 +459,170 @@ class BuiltinAdapter(BaseAgentAdapter):
         tasks: List[AgentTask],
         workflow_config: Dict[str, Any] = None
     ) -> List[AgentResult]:
-        """Orchestrate a workflow of multiple tasks"""
+        """
+        Orchestrate a workflow of multiple tasks.
+        
+        Tasks sharing a priority are independent and run concurrently on
+        the executor; each tier's outputs are chained into later tiers only
+        once the whole tier has finished.
+        """
         results = []
         workflow_config = workflow_config or {}
+        tiers = self._plan_tiers(tasks, workflow_config)
         
-        # Sort tasks by priority
-        sorted_tasks = sorted(tasks, key=lambda t: t.priority)
-        
-        # Execute tasks
-        for task in sorted_tasks:
-            # Find appropriate agent
-            agent_id = workflow_config.get("agent_mapping", {}).get(task.task_type)
-            
-            if not agent_id:
-                # Auto-select agent based on task type
-                agent_id = self._select_agent_for_task(task)
+        for index, tier in enumerate(tiers):
+            tier_results = list(self.executor.map(lambda pair: self._execute_assigned(*pair), tier))
+            results.extend(tier_results)
             
-            if agent_id:
-                result = self.execute_task(agent_id, task)
-                results.append(result)
-                
-                # Pass output to next task if chained
-                if result.success and workflow_config.get("chain_outputs", True):
-                    # Update subsequent task inputs with this result
-                    for next_task in sorted_tasks:
-                        if next_task.task_id != task.task_id:
-                            next_task.input_data[f"{task.task_type}_result"] = result.output
-            else:
-                results.append(AgentResult(
+            if workflow_config.get("chain_outputs", True):
+                self._chain_outputs(tier, tier_results, tiers[index + 1:])
+        
+        return results
+    
+    async def aexecute_task(
+        self,
+        agent_id: str,
+        task: AgentTask
+    ) -> AgentResult:
+        """Execute a task on the executor without blocking the event loop"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self.execute_task, agent_id, task)
+    
+    async def aorchestrate_workflow(
+        self,
+        tasks: List[AgentTask],
+        workflow_config: Dict[str, Any] = None
+    ) -> List[AgentResult]:
+        """
+        Orchestrate a workflow from within an event loop.
+        
+        Same tiering and chaining as orchestrate_workflow, with each tier
+        awaited through asyncio.gather.
+        """
+        results = []
+        workflow_config = workflow_config or {}
+        tiers = self._plan_tiers(tasks, workflow_config)
+        loop = asyncio.get_running_loop()
+        
+        for index, tier in enumerate(tiers):
+            outcomes = await asyncio.gather(
+                *[
+                    loop.run_in_executor(self.executor, self._execute_assigned, agent_id, task)
+                    for agent_id, task in tier
+                ],
+                return_exceptions=True
+            )
+            tier_results = [
+                AgentResult(
                     task_id=task.task_id,
-                    agent_id="none",
+                    agent_id=agent_id or "none",
                     success=False,
                     output={},
-                    error="No suitable agent found for task"
-                ))
+                    error=str(outcome)
+                ) if isinstance(outcome, BaseException) else outcome
+                for (agent_id, task), outcome in zip(tier, outcomes)
+            ]
+            results.extend(tier_results)
+            
+            if workflow_config.get("chain_outputs", True):
+                self._chain_outputs(tier, tier_results, tiers[index + 1:])
         
         return results
     
-    def _select_agent_for_task(self, task: AgentTask) -> Optional[str]:
-        """Auto-select appropriate agent for a task"""
-        task_agent_mapping = {
-            "analyze": AgentType.DATA_ANALYSIS,
-            "diagnose": AgentType.DIAGNOSIS,
-            "predict": AgentType.DATA_ANALYSIS,
-            "schedule": AgentType.SCHEDULING,
-            "engage": AgentType.CUSTOMER_ENGAGEMENT,
-            "feedback": AgentType.FEEDBACK,
-            "rca_capa": AgentType.RCA_CAPA
-        }
+    def _plan_tiers(
+        self,
+        tasks: List[AgentTask],
+        workflow_config: Dict[str, Any]
+    ) -> List[List[Tuple[Optional[str], AgentTask]]]:
+        """Split tasks into priority tiers of (agent_id, task) pairs"""
+        agent_mapping = workflow_config.get("agent_mapping", {})
         
-        target_type = task_agent_mapping.get(task.task_type)
+        # Find appropriate agent, auto-selecting by task type if unmapped
+        return [
+            [
+                (agent_mapping.get(task.task_type) or self._select_agent_for_task(task), task)
+                for task in tier
+            ]
+            for _, tier in groupby(sort_tasks_by_priority(tasks), key=lambda t: t.priority)
+        ]
+    
+    @staticmethod
+    def _chain_outputs(
+        tier: List[Tuple[Optional[str], AgentTask]],
+        tier_results: List[AgentResult],
+        later_tiers: List[List[Tuple[Optional[str], AgentTask]]]
+    ):
+        """Pass a finished tier's outputs on to the later tasks that consume them"""
+        later_tasks = [task for later_tier in later_tiers for _, task in later_tier]
         
-        if target_type:
-            for agent_id, agent in self.agents.items():
-                if agent.agent_type == target_type:
-                    return agent_id
+        for (_, task), result in zip(tier, tier_results):
+            if result.success:
+                key = f"{task.task_type}_result"
+                for next_task in later_tasks:
+                    if next_task.expected_inputs is None or key in next_task.expected_inputs:
+                        next_task.input_data[key] = result.output
+    
+    def _execute_assigned(self, agent_id: Optional[str], task: AgentTask) -> AgentResult:
+        """Execute a task on its selected agent"""
+        if not agent_id:
+            return AgentResult(
+                task_id=task.task_id,
+                agent_id="none",
+                success=False,
+                output={},
+                error="No suitable agent found for task"
+            )
         
-        # Fallback to master agent
-        for agent_id, agent in self.agents.items():
-            if agent.agent_type == AgentType.MASTER:
-                return agent_id
+        return self.execute_task(agent_id, task)
+    
+    def analyze_fleet(self, telemetry_list: List[Dict[str, Any]]) -> List[Dict]:
+        """
+        Run the "analyze" health checks over many vehicles at once.
+        
+        Returns one analysis per telemetry record, identical to what an
+        "analyze" task produces. Large fleets are checked with vectorized
+        NumPy comparisons instead of four Python comparisons per vehicle.
+        """
+        if not NUMPY_AVAILABLE or len(telemetry_list) < _NUMPY_FLEET_THRESHOLD:
+            return [
+                BuiltinAgent.analyze_telemetry(telemetry)
+                for telemetry in telemetry_list
+            ]
+        
+        count = len(telemetry_list)
+        
+        def column(key: str, default: float) -> "np.ndarray":
+            return np.fromiter(
+                (t.get(key, default) for t in telemetry_list), dtype=np.float64, count=count
+            )
+        
+        engine_ok = (column("engine_temp", 90) < 100).tolist()
+        oil_ok = (column("oil_pressure", 40) > 30).tolist()
+        battery_ok = (column("battery_voltage", 12) > 11.5).tolist()
+        brakes_ok = (column("brake_pad_wear_avg", 0.5) > 0.2).tolist()
         
-        return None
+        return [
+            BuiltinAgent.build_analysis(
+                telemetry.get("vehicle_id", "unknown"),
+                engine_ok[i], oil_ok[i], battery_ok[i], brakes_ok[i]
+            )
+            for i, telemetry in enumerate(telemetry_list)
+        ]
+    
+    def _select_agent_for_task(self, task: AgentTask) -> Optional[str]:
+        """Auto-select appropriate agent for a task"""
+        # Fallback to master agent
+        agent_ids = (
+            self._type_index.get(_TASK_AGENT_TYPES.get(task.task_type))
+            or self._type_index.get(AgentType.MASTER)
+        )
+        return agent_ids[0] if agent_ids else None
     
     def shutdown(self):
         """Cleanup and shutdown"""
         super().shutdown()
-        self.executor.shutdown(wait=True)
+        self._type_index.clear()
+        
+        # The shared pool outlives any single adapter
+        if self._owns_executor:
+            self.executor.shutdown(wait=True)
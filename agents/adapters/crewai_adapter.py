@@ -3,14 +3,21 @@ AutoSentry AI - CrewAI Agent Framework Adapter
 Adapter for CrewAI multi-agent collaboration framework
 """
 
-from typing import Dict, Any, List, Callable, Optional
+from typing import Dict, Any, List, Callable, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from itertools import groupby
+from types import MappingProxyType
+import asyncio
+import functools
 import logging
+import os
 import time
 import uuid
 from datetime import datetime
 
 from .base_adapter import (
-    BaseAgentAdapter, AgentType, AgentTask, AgentResult
+    BaseAgentAdapter, AgentType, AgentTask, AgentResult, AGENT_TYPE_VALUES,
+    sort_tasks_by_priority
 )
 
 logger = logging.getLogger(__name__)
@@ -24,6 +31,62 @@ except ImportError:
     logger.warning("CrewAI not installed. Install with: pip install crewai")
 
 
+# CrewAI persona per agent type
+_AGENT_CONFIGS = MappingProxyType({
+    AgentType.MASTER: {
+        "role": "Master Orchestrator",
+        "goal": "Coordinate all vehicle maintenance activities and ensure optimal system operation",
+        "backstory": "Expert AI orchestrator with deep knowledge of automotive systems and predictive maintenance"
+    },
+    AgentType.DATA_ANALYSIS: {
+        "role": "Data Analysis Specialist",
+        "goal": "Analyze vehicle telemetry data to identify patterns and anomalies",
+        "backstory": "Expert data scientist specialized in automotive sensor data analysis"
+    },
+    AgentType.DIAGNOSIS: {
+        "role": "Vehicle Diagnostics Expert",
+        "goal": "Diagnose vehicle issues and determine root causes",
+        "backstory": "Master automotive technician with decades of experience in vehicle diagnostics"
+    },
+    AgentType.CUSTOMER_ENGAGEMENT: {
+        "role": "Customer Success Manager",
+        "goal": "Engage with customers and ensure excellent service experience",
+        "backstory": "Expert in customer communication with deep empathy and automotive knowledge"
+    },
+    AgentType.SCHEDULING: {
+        "role": "Service Scheduling Coordinator",
+        "goal": "Optimize service appointment scheduling for customer convenience",
+        "backstory": "Operations expert skilled in resource allocation and scheduling optimization"
+    },
+    AgentType.FEEDBACK: {
+        "role": "Customer Feedback Analyst",
+        "goal": "Collect and analyze customer feedback to improve service quality",
+        "backstory": "Customer experience specialist focused on continuous improvement"
+    },
+    AgentType.RCA_CAPA: {
+        "role": "Quality Engineer",
+        "goal": "Perform root cause analysis and implement corrective actions",
+        "backstory": "Six Sigma certified quality engineer with automotive manufacturing expertise"
+    }
+})
+
+_DEFAULT_AGENT_CONFIG = MappingProxyType({
+    "role": "General Agent",
+    "goal": "Assist with vehicle maintenance tasks",
+    "backstory": "Versatile AI assistant"
+})
+
+# Task type -> keyword matched against agent roles
+_TASK_ROLE_KEYWORDS = MappingProxyType({
+    "analyze": "data analysis",
+    "diagnose": "diagnostics",
+    "engage": "customer",
+    "schedule": "scheduling",
+    "feedback": "feedback",
+    "rca_capa": "quality"
+})
+
+
 class CrewAIAdapter(BaseAgentAdapter):
     """
     CrewAI agent framework adapter.
@@ -39,6 +102,16 @@ class CrewAIAdapter(BaseAgentAdapter):
         super().__init__(config)
         self.crews: Dict[str, Any] = {}
         self.crewai_agents: Dict[str, Any] = {}
+        self._role_index: Dict[str, Any] = {}
+        self.executor = ThreadPoolExecutor(
+            max_workers=self.config.get("max_workers", min(32, (os.cpu_count() or 1) * 4))
+        )
+        
+        # CrewAI availability is fixed at import time, so pick the
+        # fallback-only paths once instead of re-checking on every call
+        if not CREWAI_AVAILABLE:
+            self.execute_task = self._execute_fallback_only
+            self.orchestrate_workflow = self._fallback_orchestrate
     
     def initialize(self) -> bool:
         """Initialize CrewAI framework"""
@@ -51,7 +124,7 @@ class CrewAIAdapter(BaseAgentAdapter):
             self.is_initialized = True
             return True
         except Exception as e:
-            logger.error(f"Failed to initialize CrewAI: {e}")
+            logger.error("Failed to initialize CrewAI: %s", e)
             return False
     
     def create_agent(
@@ -69,49 +142,7 @@ class CrewAIAdapter(BaseAgentAdapter):
         config = config or {}
         
         # Define agent based on type
-        agent_configs = {
-            AgentType.MASTER: {
-                "role": "Master Orchestrator",
-                "goal": "Coordinate all vehicle maintenance activities and ensure optimal system operation",
-                "backstory": "Expert AI orchestrator with deep knowledge of automotive systems and predictive maintenance"
-            },
-            AgentType.DATA_ANALYSIS: {
-                "role": "Data Analysis Specialist",
-                "goal": "Analyze vehicle telemetry data to identify patterns and anomalies",
-                "backstory": "Expert data scientist specialized in automotive sensor data analysis"
-            },
-            AgentType.DIAGNOSIS: {
-                "role": "Vehicle Diagnostics Expert",
-                "goal": "Diagnose vehicle issues and determine root causes",
-                "backstory": "Master automotive technician with decades of experience in vehicle diagnostics"
-            },
-            AgentType.CUSTOMER_ENGAGEMENT: {
-                "role": "Customer Success Manager",
-                "goal": "Engage with customers and ensure excellent service experience",
-                "backstory": "Expert in customer communication with deep empathy and automotive knowledge"
-            },
-            AgentType.SCHEDULING: {
-                "role": "Service Scheduling Coordinator",
-                "goal": "Optimize service appointment scheduling for customer convenience",
-                "backstory": "Operations expert skilled in resource allocation and scheduling optimization"
-            },
-            AgentType.FEEDBACK: {
-                "role": "Customer Feedback Analyst",
-                "goal": "Collect and analyze customer feedback to improve service quality",
-                "backstory": "Customer experience specialist focused on continuous improvement"
-            },
-            AgentType.RCA_CAPA: {
-                "role": "Quality Engineer",
-                "goal": "Perform root cause analysis and implement corrective actions",
-                "backstory": "Six Sigma certified quality engineer with automotive manufacturing expertise"
-            }
-        }
-        
-        agent_config = agent_configs.get(agent_type, {
-            "role": "General Agent",
-            "goal": "Assist with vehicle maintenance tasks",
-            "backstory": "Versatile AI assistant"
-        })
+        agent_config = _AGENT_CONFIGS.get(agent_type, _DEFAULT_AGENT_CONFIG)
         
         try:
             crewai_agent = Agent(
@@ -123,17 +154,23 @@ class CrewAIAdapter(BaseAgentAdapter):
             )
             
             self.crewai_agents[agent_id] = crewai_agent
+            
+            # Index by role keyword; the first matching agent wins
+            role = crewai_agent.role.lower()
+            for keyword in _TASK_ROLE_KEYWORDS.values():
+                if keyword in role:
+                    self._role_index.setdefault(keyword, crewai_agent)
             self.agents[agent_id] = {
                 "crewai_agent": crewai_agent,
                 "type": agent_type,
                 "config": config
             }
             
-            logger.info(f"Created CrewAI agent: {agent_id} ({agent_type.value})")
+            logger.info("Created CrewAI agent: %s (%s)", agent_id, AGENT_TYPE_VALUES[agent_type])
             return crewai_agent
             
         except Exception as e:
-            logger.error(f"Failed to create CrewAI agent: {e}")
+            logger.error("Failed to create CrewAI agent: %s", e)
             return None
     
     def execute_task(
@@ -154,16 +191,12 @@ class CrewAIAdapter(BaseAgentAdapter):
                 error=f"Agent {agent_id} not found"
             )
         
-        if not CREWAI_AVAILABLE:
-            # Fallback to simple execution
-            return self._fallback_execute(agent_id, task, start_time)
-        
         try:
             crewai_agent = agent_data["crewai_agent"]
             
             # Create CrewAI task
             crewai_task = Task(
-                description=task.description,
+                description=self._format_task_description(task),
                 expected_output="Structured JSON output with analysis results",
                 agent=crewai_agent
             )
@@ -192,11 +225,34 @@ class CrewAIAdapter(BaseAgentAdapter):
             
         except Exception as e:
             execution_time = (time.time() - start_time) * 1000
-            logger.error(f"CrewAI execution error: {e}")
+            logger.error("CrewAI execution error: %s", e)
             
             # Fallback to simple execution
             return self._fallback_execute(agent_id, task, start_time)
     
+    @staticmethod
+    def _format_task_description(task: AgentTask) -> str:
+        """CrewAI task description with the task's input data attached"""
+        # input_json() is serialized once per task and reused on retries
+        return f"{task.description}\nInput: {task.input_json()}"
+    
+    def _execute_fallback_only(
+        self,
+        agent_id: str,
+        task: AgentTask
+    ) -> AgentResult:
+        """execute_task when CrewAI is not installed"""
+        if agent_id not in self.agents:
+            return AgentResult(
+                task_id=task.task_id,
+                agent_id=agent_id,
+                success=False,
+                output={},
+                error=f"Agent {agent_id} not found"
+            )
+        
+        return self._fallback_execute(agent_id, task, time.time())
+    
     def _fallback_execute(
         self,
         agent_id: str,
@@ -211,7 +267,7 @@ class CrewAIAdapter(BaseAgentAdapter):
         output = {
             "task_id": task.task_id,
             "task_type": task.task_type,
-            "agent_type": agent_type.value if hasattr(agent_type, 'value') else str(agent_type),
+            "agent_type": AGENT_TYPE_VALUES.get(agent_type) or str(agent_type),
             "status": "completed",
             "framework": "crewai_fallback",
             "timestamp": datetime.now().isoformat()
@@ -234,66 +290,185 @@ class CrewAIAdapter(BaseAgentAdapter):
         workflow_config: Dict[str, Any] = None
     ) -> List[AgentResult]:
         """Orchestrate workflow using CrewAI crew"""
-        if not CREWAI_AVAILABLE or not self.crewai_agents:
+        if not self.crewai_agents:
             # Fallback orchestration
             return self._fallback_orchestrate(tasks, workflow_config)
         
-        results = []
         workflow_config = workflow_config or {}
         
         try:
-            # Create tasks for crew
+            # Create tasks for crew; each task's callback records its output
+            # and completion time as the crew works through them
             crewai_tasks = []
-            agent_list = list(self.crewai_agents.values())
+            completed: Dict[int, Tuple[Any, float]] = {}
             
-            for task in sorted(tasks, key=lambda t: t.priority):
+            def record(index: int, task_output: Any):
+                completed[index] = (task_output, time.time())
+            
+            for index, task in enumerate(sort_tasks_by_priority(tasks)):
                 # Find appropriate agent
                 agent = self._select_agent_for_task(task)
                 
                 crewai_task = Task(
-                    description=f"{task.description}\nInput: {task.input_data}",
+                    description=self._format_task_description(task),
                     expected_output="Structured analysis and recommendations",
-                    agent=agent
+                    agent=agent,
+                    callback=functools.partial(record, index)
                 )
                 crewai_tasks.append((task, crewai_task, agent))
             
-            # Execute each task individually to capture results
-            for task, crewai_task, agent in crewai_tasks:
-                start_time = time.time()
-                
-                crew = Crew(
-                    agents=[agent],
-                    tasks=[crewai_task],
-                    process=Process.sequential
-                )
-                
-                try:
-                    crew_result = crew.kickoff()
-                    execution_time = (time.time() - start_time) * 1000
-                    
-                    results.append(AgentResult(
-                        task_id=task.task_id,
-                        agent_id=agent.role,
-                        success=True,
-                        output={"result": str(crew_result)},
-                        execution_time_ms=execution_time,
-                        metadata={"framework": "crewai"}
-                    ))
-                except Exception as e:
+            # Run every task in a single crew
+            crew = Crew(
+                agents=list({id(agent): agent for _, _, agent in crewai_tasks}.values()),
+                tasks=[crewai_task for _, crewai_task, _ in crewai_tasks],
+                process=Process.sequential
+            )
+            
+            error = None
+            start_time = time.time()
+            try:
+                crew.kickoff()
+            except Exception as e:
+                logger.error("CrewAI crew kickoff error: %s", e)
+                error = str(e)
+            
+            # Split the crew run back into per-task results
+            results = []
+            previous_end = start_time
+            
+            for index, (task, _, agent) in enumerate(crewai_tasks):
+                if index not in completed:
                     results.append(AgentResult(
                         task_id=task.task_id,
                         agent_id=agent.role if agent else "unknown",
                         success=False,
                         output={},
-                        error=str(e)
+                        error=error or "Task did not complete"
                     ))
+                    continue
+                
+                task_output, end_time = completed[index]
+                results.append(AgentResult(
+                    task_id=task.task_id,
+                    agent_id=agent.role,
+                    success=True,
+                    output={"result": str(task_output)},
+                    execution_time_ms=(end_time - previous_end) * 1000,
+                    metadata={"framework": "crewai"}
+                ))
+                previous_end = end_time
             
             return results
             
         except Exception as e:
-            logger.error(f"CrewAI orchestration error: {e}")
+            logger.error("CrewAI orchestration error: %s", e)
             return self._fallback_orchestrate(tasks, workflow_config)
     
+    def _kickoff_task(self, task: AgentTask, crewai_task: Any, agent: Any) -> AgentResult:
+        """Run a single CrewAI task in its own one-agent crew"""
+        start_time = time.time()
+        
+        crew = Crew(
+            agents=[agent],
+            tasks=[crewai_task],
+            process=Process.sequential
+        )
+        
+        try:
+            crew_result = crew.kickoff()
+            execution_time = (time.time() - start_time) * 1000
+            
+            return AgentResult(
+                task_id=task.task_id,
+                agent_id=agent.role,
+                success=True,
+                output={"result": str(crew_result)},
+                execution_time_ms=execution_time,
+                metadata={"framework": "crewai"}
+            )
+        except Exception as e:
+            return AgentResult(
+                task_id=task.task_id,
+                agent_id=agent.role if agent else "unknown",
+                success=False,
+                output={},
+                error=str(e)
+            )
+    
+    async def aexecute_task(
+        self,
+        agent_id: str,
+        task: AgentTask
+    ) -> AgentResult:
+        """Execute a task on the executor without blocking the event loop"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self.execute_task, agent_id, task)
+    
+    async def aorchestrate_workflow(
+        self,
+        tasks: List[AgentTask],
+        workflow_config: Dict[str, Any] = None
+    ) -> List[AgentResult]:
+        """
+        Orchestrate workflow from within an event loop.
+        
+        Priority tiers run in order. Within a tier each agent's crews run
+        one after another (kickoff mutates the shared Agent), while
+        different agents are kicked off concurrently on the executor and
+        awaited with asyncio.gather.
+        """
+        if not CREWAI_AVAILABLE or not self.crewai_agents:
+            return self._fallback_orchestrate(tasks, workflow_config)
+        
+        results = []
+        loop = asyncio.get_running_loop()
+        
+        for _, tier in groupby(sort_tasks_by_priority(tasks), key=lambda t: t.priority):
+            # id(agent) -> (agent, [(position in tier, task, crewai task)])
+            runs: Dict[int, Tuple[Any, List[Tuple[int, AgentTask, Any]]]] = {}
+            count = 0
+            for position, task in enumerate(tier):
+                agent = self._select_agent_for_task(task)
+                crewai_task = Task(
+                    description=self._format_task_description(task),
+                    expected_output="Structured analysis and recommendations",
+                    agent=agent
+                )
+                runs.setdefault(id(agent), (agent, []))[1].append((position, task, crewai_task))
+                count += 1
+            
+            agent_outcomes = await asyncio.gather(*[
+                loop.run_in_executor(self.executor, self._kickoff_agent_tasks, agent, assigned)
+                for agent, assigned in runs.values()
+            ])
+            
+            tier_results: List[Optional[AgentResult]] = [None] * count
+            for outcomes in agent_outcomes:
+                for position, result in outcomes:
+                    tier_results[position] = result
+            results.extend(tier_results)
+        
+        return results
+    
+    def _kickoff_agent_tasks(
+        self, agent: Any, assigned: List[Tuple[int, AgentTask, Any]]
+    ) -> List[Tuple[int, AgentResult]]:
+        """Kick off one agent's tasks in turn, as (position, result) pairs"""
+        outcomes = []
+        for position, task, crewai_task in assigned:
+            try:
+                result = self._kickoff_task(task, crewai_task, agent)
+            except Exception as e:
+                result = AgentResult(
+                    task_id=task.task_id,
+                    agent_id=agent.role if agent else "unknown",
+                    success=False,
+                    output={},
+                    error=str(e)
+                )
+            outcomes.append((position, result))
+        return outcomes
+    
     def _fallback_orchestrate(
         self,
         tasks: List[AgentTask],
@@ -301,9 +476,9 @@ class CrewAIAdapter(BaseAgentAdapter):
     ) -> List[AgentResult]:
         """Fallback orchestration"""
         results = []
+        agent_id = next(iter(self.agents), "default")
         
-        for task in sorted(tasks, key=lambda t: t.priority):
-            agent_id = list(self.agents.keys())[0] if self.agents else "default"
+        for task in sort_tasks_by_priority(tasks):
             result = self._fallback_execute(agent_id, task, time.time())
             results.append(result)
         
@@ -311,23 +486,12 @@ class CrewAIAdapter(BaseAgentAdapter):
     
     def _select_agent_for_task(self, task: AgentTask):
         """Select appropriate CrewAI agent for task"""
-        task_role_mapping = {
-            "analyze": "Data Analysis",
-            "diagnose": "Diagnostics",
-            "engage": "Customer",
-            "schedule": "Scheduling",
-            "feedback": "Feedback",
-            "rca_capa": "Quality"
-        }
-        
-        target_keyword = task_role_mapping.get(task.task_type, "")
-        
-        for agent in self.crewai_agents.values():
-            if target_keyword.lower() in agent.role.lower():
-                return agent
+        agent = self._role_index.get(_TASK_ROLE_KEYWORDS.get(task.task_type))
+        if agent is not None:
+            return agent
         
         # Return first agent as default
-        return list(self.crewai_agents.values())[0] if self.crewai_agents else None
+        return next(iter(self.crewai_agents.values()), None)
     
     def create_crew(
         self,
@@ -355,6 +519,11 @@ class CrewAIAdapter(BaseAgentAdapter):
         )
         
         self.crews[crew_id] = crew
-        logger.info(f"Created crew: {crew_id} with {len(agents)} agents")
+        logger.info("Created crew: %s with %d agents", crew_id, len(agents))
         
         return crew
+    
+    def shutdown(self):
+        """Cleanup and shutdown"""
+        super().shutdown()
+        self.executor.shutdown(wait=True)
@@ -3,18 +3,42 @@ AutoSentry AI - LangGraph Agent Framework Adapter
 Adapter for LangChain's LangGraph state machine framework
 """
 
-from typing import Dict, Any, List, Callable, Optional
+from typing import Annotated, Dict, Any, List, Callable, ClassVar, Optional, Tuple, TypedDict
+from collections import OrderedDict, defaultdict
+from itertools import count, groupby
+from operator import add
+from types import MappingProxyType
+import asyncio
+import copy
+import heapq
 import logging
+import threading
 import time
-import uuid
 from datetime import datetime
 
 from .base_adapter import (
-    BaseAgentAdapter, AgentType, AgentTask, AgentResult
+    BaseAgentAdapter, AgentType, AgentTask, AgentResult, short_id,
+    sort_tasks_by_priority
 )
 
 logger = logging.getLogger(__name__)
 
+# Optional NumPy fast path for batched telemetry analysis
+NUMPY_AVAILABLE = False
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    pass
+
+# Below this many vehicles NumPy's fixed overhead outweighs the savings
+_NUMPY_BATCH_THRESHOLD = 64
+
+# Health thresholds shared by the scalar and batched analyze paths
+_ENGINE_TEMP_MAX = 100
+_OIL_PRESSURE_MIN = 30
+_BATTERY_VOLTAGE_MIN = 11.5
+
 # Optional LangGraph imports
 LANGGRAPH_AVAILABLE = False
 try:
@@ -25,6 +49,32 @@ except ImportError:
     logger.warning("LangGraph not installed. Install with: pip install langgraph langchain-core")
 
 
+# Agent types whose nodes mint fresh IDs (diagnosis, engagement,
+# appointment); their results are never served from the result cache
+_UNCACHEABLE_AGENT_TYPES = frozenset({
+    AgentType.DIAGNOSIS,
+    AgentType.CUSTOMER_ENGAGEMENT,
+    AgentType.SCHEDULING
+})
+
+# Task type -> agent type that handles it
+_TASK_AGENT_TYPES = MappingProxyType({
+    "analyze": AgentType.DATA_ANALYSIS,
+    "diagnose": AgentType.DIAGNOSIS,
+    "engage": AgentType.CUSTOMER_ENGAGEMENT,
+    "schedule": AgentType.SCHEDULING
+})
+
+
+class AgentState(TypedDict):
+    """State carried through an agent graph"""
+    messages: Annotated[List, add]
+    input_data: Dict
+    output_data: Dict
+    status: str
+    error: Optional[str]
+
+
 class LangGraphAdapter(BaseAgentAdapter):
     """
     LangGraph agent framework adapter.
@@ -36,10 +86,28 @@ class LangGraphAdapter(BaseAgentAdapter):
         pip install langgraph langchain-core langchain-openai
     """
     
+    # Compiled graphs depend only on the agent type and are immutable, so
+    # every adapter and agent of a type shares one
+    _compiled_graph_cache: ClassVar[Dict[AgentType, Any]] = {}
+    
+    # ChatOpenAI clients keyed by (api key, model); each owns an HTTP
+    # connection pool, so adapters with the same settings share one
+    _llm_cache: ClassVar[Dict[Tuple[str, str], Any]] = {}
+    
     def __init__(self, config: Dict[str, Any] = None):
         super().__init__(config)
         self.graphs: Dict[str, Any] = {}
         self.llm = None
+        # Agent type -> agent IDs, maintained by create_agent
+        self._type_index: Dict[AgentType, List[str]] = defaultdict(list)
+        # Streamed tasks awaiting drain(): (priority, arrival order, task)
+        self._pending: List[Tuple[int, int, AgentTask]] = []
+        self._arrivals = count()
+        # (agent_id, input JSON) -> (stored at, final graph state), LRU order
+        self._result_cache: "OrderedDict[Tuple[str, str], Tuple[float, Dict]]" = OrderedDict()
+        self._result_cache_lock = threading.Lock()
+        self.result_cache_size = self.config.get("result_cache_size", 1024)
+        self.result_cache_ttl = self.config.get("result_cache_ttl_seconds", 60)
     
     def initialize(self) -> bool:
         """Initialize LangGraph framework"""
@@ -52,11 +120,9 @@ class LangGraphAdapter(BaseAgentAdapter):
             llm_api_key = self.config.get("llm_api_key")
             if llm_api_key:
                 try:
-                    from langchain_openai import ChatOpenAI
-                    self.llm = ChatOpenAI(
-                        api_key=llm_api_key,
-                        model=self.config.get("llm_model", "gpt-4-turbo-preview"),
-                        temperature=0.1
+                    self.llm = self._get_llm(
+                        llm_api_key,
+                        self.config.get("llm_model", "gpt-4-turbo-preview")
                     )
                     logger.info("LangGraph initialized with OpenAI LLM")
                 except Exception as e:
@@ -69,6 +135,16 @@ class LangGraphAdapter(BaseAgentAdapter):
             logger.error(f"Failed to initialize LangGraph: {e}")
             return False
     
+    @classmethod
+    def _get_llm(cls, api_key: str, model: str):
+        """ChatOpenAI client for the settings, created once and reused"""
+        llm = cls._llm_cache.get((api_key, model))
+        if llm is None:
+            from langchain_openai import ChatOpenAI
+            llm = ChatOpenAI(api_key=api_key, model=model, temperature=0.1)
+            cls._llm_cache[(api_key, model)] = llm
+        return llm
+    
     def create_agent(
         self,
         agent_type: AgentType,
@@ -90,6 +166,8 @@ class LangGraphAdapter(BaseAgentAdapter):
             "config": config
         }
         self.graphs[agent_id] = graph
+        if agent_id not in self._type_index[agent_type]:
+            self._type_index[agent_type].append(agent_id)
         
         logger.info(f"Created LangGraph agent: {agent_id} ({agent_type.value})")
         return graph
@@ -100,122 +178,146 @@ class LangGraphAdapter(BaseAgentAdapter):
         tools: List[Callable] = None,
         config: Dict[str, Any] = None
     ):
-        """Create a state graph for the agent type"""
-        from typing import TypedDict, Annotated
-        from operator import add
-        
-        # Define state schema
-        class AgentState(TypedDict):
-            messages: Annotated[List, add]
-            input_data: Dict
-            output_data: Dict
-            status: str
-            error: Optional[str]
+        """Create a state graph for the agent type (compiled once per type)"""
+        graph = self._compiled_graph_cache.get(agent_type)
+        if graph is not None:
+            return graph
         
         # Create graph
         graph = StateGraph(AgentState)
         
-        # Define nodes based on agent type
-        if agent_type == AgentType.DATA_ANALYSIS:
-            graph.add_node("analyze", self._analyze_node)
-            graph.set_entry_point("analyze")
-            graph.add_edge("analyze", END)
-            
-        elif agent_type == AgentType.DIAGNOSIS:
-            graph.add_node("diagnose", self._diagnose_node)
-            graph.set_entry_point("diagnose")
-            graph.add_edge("diagnose", END)
-            
-        elif agent_type == AgentType.CUSTOMER_ENGAGEMENT:
-            graph.add_node("engage", self._engage_node)
-            graph.set_entry_point("engage")
-            graph.add_edge("engage", END)
-            
-        elif agent_type == AgentType.SCHEDULING:
-            graph.add_node("schedule", self._schedule_node)
-            graph.set_entry_point("schedule")
-            graph.add_edge("schedule", END)
-            
-        else:
-            graph.add_node("process", self._generic_node)
-            graph.set_entry_point("process")
-            graph.add_edge("process", END)
+        # Single node per agent type: entry -> node -> END
+        name, node = _NODE_SPECS.get(agent_type, _DEFAULT_NODE_SPEC)
+        graph.add_node(name, node)
+        graph.set_entry_point(name)
+        graph.add_edge(name, END)
         
-        return graph.compile()
+        compiled = graph.compile()
+        self._compiled_graph_cache[agent_type] = compiled
+        return compiled
     
-    def _analyze_node(self, state: Dict) -> Dict:
+    @staticmethod
+    def _analyze_node(state: Dict) -> Dict:
         """Data analysis node"""
         input_data = state.get("input_data", {})
         telemetry = input_data.get("telemetry", {})
         
+        return LangGraphAdapter._analysis_update(
+            telemetry.get("vehicle_id", "unknown"),
+            engine_ok=telemetry.get("engine_temp", 90) < _ENGINE_TEMP_MAX,
+            oil_ok=telemetry.get("oil_pressure", 40) > _OIL_PRESSURE_MIN,
+            battery_ok=telemetry.get("battery_voltage", 12) > _BATTERY_VOLTAGE_MIN
+        )
+    
+    @staticmethod
+    def _analyze_batch(states: List[Dict]) -> List[Dict]:
+        """
+        Run the analyze node over many states at once.
+        
+        Returns the same state updates as calling _analyze_node on each
+        state. Large batches are thresholded with one vectorized NumPy
+        comparison per feature instead of three Python comparisons per vehicle.
+        """
+        if not NUMPY_AVAILABLE or len(states) < _NUMPY_BATCH_THRESHOLD:
+            return [LangGraphAdapter._analyze_node(state) for state in states]
+        
+        telemetry_list = [
+            state.get("input_data", {}).get("telemetry", {}) for state in states
+        ]
+        count = len(telemetry_list)
+        
+        def column(key: str, default: float) -> "np.ndarray":
+            return np.fromiter(
+                (t.get(key, default) for t in telemetry_list), dtype=np.float64, count=count
+            )
+        
+        engine_ok = (column("engine_temp", 90) < _ENGINE_TEMP_MAX).tolist()
+        oil_ok = (column("oil_pressure", 40) > _OIL_PRESSURE_MIN).tolist()
+        battery_ok = (column("battery_voltage", 12) > _BATTERY_VOLTAGE_MIN).tolist()
+        
+        return [
+            LangGraphAdapter._analysis_update(
+                telemetry.get("vehicle_id", "unknown"),
+                engine_ok[i], oil_ok[i], battery_ok[i]
+            )
+            for i, telemetry in enumerate(telemetry_list)
+        ]
+    
+    @staticmethod
+    def _analysis_update(
+        vehicle_id: str,
+        engine_ok: bool,
+        oil_ok: bool,
+        battery_ok: bool
+    ) -> Dict:
+        """Build the analyze node's state update from per-system checks"""
         analysis = {
-            "vehicle_id": telemetry.get("vehicle_id", "unknown"),
+            "vehicle_id": vehicle_id,
             "health_indicators": {
-                "engine": "good" if telemetry.get("engine_temp", 90) < 100 else "warning",
-                "oil": "good" if telemetry.get("oil_pressure", 40) > 30 else "warning",
-                "battery": "good" if telemetry.get("battery_voltage", 12) > 11.5 else "warning"
+                "engine": "good" if engine_ok else "warning",
+                "oil": "good" if oil_ok else "warning",
+                "battery": "good" if battery_ok else "warning"
             },
             "analyzed_by": "langgraph"
         }
         
         return {
-            **state,
             "output_data": analysis,
             "status": "completed"
         }
     
-    def _diagnose_node(self, state: Dict) -> Dict:
+    @staticmethod
+    def _diagnose_node(state: Dict) -> Dict:
         """Diagnosis node"""
         input_data = state.get("input_data", {})
         
         diagnosis = {
-            "diagnosis_id": f"DX-{uuid.uuid4().hex[:8].upper()}",
+            "diagnosis_id": short_id("DX"),
             "findings": ["Analysis complete"],
             "diagnosed_by": "langgraph"
         }
         
         return {
-            **state,
             "output_data": diagnosis,
             "status": "completed"
         }
     
-    def _engage_node(self, state: Dict) -> Dict:
+    @staticmethod
+    def _engage_node(state: Dict) -> Dict:
         """Customer engagement node"""
         input_data = state.get("input_data", {})
         
         engagement = {
-            "engagement_id": f"ENG-{uuid.uuid4().hex[:8].upper()}",
+            "engagement_id": short_id("ENG"),
             "message": "Your vehicle requires attention.",
             "engaged_by": "langgraph"
         }
         
         return {
-            **state,
             "output_data": engagement,
             "status": "completed"
         }
     
-    def _schedule_node(self, state: Dict) -> Dict:
+    @staticmethod
+    def _schedule_node(state: Dict) -> Dict:
         """Scheduling node"""
         input_data = state.get("input_data", {})
         
         appointment = {
-            "appointment_id": f"APT-{uuid.uuid4().hex[:8].upper()}",
+            "appointment_id": short_id("APT"),
             "status": "scheduled",
             "scheduled_by": "langgraph"
         }
         
         return {
-            **state,
             "output_data": appointment,
             "status": "completed"
         }
     
-    def _generic_node(self, state: Dict) -> Dict:
+    @staticmethod
+    def _generic_node(state: Dict) -> Dict:
         """Generic processing node"""
         return {
-            **state,
             "output_data": {"processed": True},
             "status": "completed"
         }
@@ -230,53 +332,182 @@ class LangGraphAdapter(BaseAgentAdapter):
         
         agent = self.agents.get(agent_id)
         if not agent:
-            return AgentResult(
-                task_id=task.task_id,
-                agent_id=agent_id,
-                success=False,
-                output={},
-                error=f"Agent {agent_id} not found"
-            )
+            return self._agent_not_found(agent_id, task)
+        
+        cache_key = self._result_cache_key(agent_id, agent, task)
+        cached_state = self._get_cached_state(cache_key)
+        if cached_state is not None:
+            return self._build_result(agent_id, task, cached_state, start_time, cache_hit=True)
         
         try:
-            graph = agent["graph"]
-            
-            # Prepare initial state
-            initial_state = {
-                "messages": [],
-                "input_data": task.input_data,
-                "output_data": {},
-                "status": "running",
-                "error": None
-            }
-            
             # Run graph
-            result_state = graph.invoke(initial_state)
+            result_state = agent["graph"].invoke(self._initial_state(task))
+            self._cache_state(cache_key, result_state)
+            return self._build_result(agent_id, task, result_state, start_time)
             
-            execution_time = (time.time() - start_time) * 1000
-            
-            return AgentResult(
-                task_id=task.task_id,
-                agent_id=agent_id,
-                success=result_state.get("status") == "completed",
-                output=result_state.get("output_data", {}),
-                error=result_state.get("error"),
-                execution_time_ms=execution_time,
-                metadata={"framework": "langgraph"}
-            )
+        except Exception as e:
+            return self._error_result(agent_id, task, e, start_time)
+    
+    async def aexecute_task(
+        self,
+        agent_id: str,
+        task: AgentTask
+    ) -> AgentResult:
+        """Execute a task using LangGraph's native async graph.ainvoke"""
+        start_time = time.time()
+        
+        agent = self.agents.get(agent_id)
+        if not agent:
+            return self._agent_not_found(agent_id, task)
+        
+        cache_key = self._result_cache_key(agent_id, agent, task)
+        cached_state = self._get_cached_state(cache_key)
+        if cached_state is not None:
+            return self._build_result(agent_id, task, cached_state, start_time, cache_hit=True)
+        
+        try:
+            result_state = await agent["graph"].ainvoke(self._initial_state(task))
+            self._cache_state(cache_key, result_state)
+            return self._build_result(agent_id, task, result_state, start_time)
             
         except Exception as e:
-            execution_time = (time.time() - start_time) * 1000
-            logger.error(f"LangGraph execution error: {e}")
+            return self._error_result(agent_id, task, e, start_time)
+    
+    def _result_cache_key(
+        self,
+        agent_id: str,
+        agent: Dict[str, Any],
+        task: AgentTask
+    ) -> Optional[Tuple[str, str]]:
+        """Cache key for a task, or None if its agent's node isn't pure"""
+        if not self.result_cache_size or agent["type"] in _UNCACHEABLE_AGENT_TYPES:
+            return None
+        
+        return agent_id, task.input_json()
+    
+    def _get_cached_state(self, cache_key: Optional[Tuple[str, str]]) -> Optional[Dict]:
+        """Copy of the final graph state cached for a key, or None on miss/expiry"""
+        if cache_key is None:
+            return None
+        
+        with self._result_cache_lock:
+            entry = self._result_cache.get(cache_key)
+            if entry is None:
+                return None
             
-            return AgentResult(
-                task_id=task.task_id,
-                agent_id=agent_id,
-                success=False,
-                output={},
-                error=str(e),
-                execution_time_ms=execution_time
-            )
+            stored_at, result_state = entry
+            if time.monotonic() - stored_at > self.result_cache_ttl:
+                del self._result_cache[cache_key]
+                return None
+            
+            self._result_cache.move_to_end(cache_key)
+        
+        # Each hit gets its own outputs, so callers can't alter the cache
+        return copy.deepcopy(result_state)
+    
+    def _cache_state(self, cache_key: Optional[Tuple[str, str]], result_state: Dict):
+        """Remember a completed graph state, evicting the least recently used"""
+        if cache_key is None or result_state.get("status") != "completed":
+            return
+        
+        # Stored as a private copy; the caller's result keeps the original
+        result_state = copy.deepcopy(result_state)
+        with self._result_cache_lock:
+            self._result_cache[cache_key] = (time.monotonic(), result_state)
+            self._result_cache.move_to_end(cache_key)
+            if len(self._result_cache) > self.result_cache_size:
+                self._result_cache.popitem(last=False)
+    
+    def execute_task_batch(
+        self,
+        agent_id: str,
+        tasks: List[AgentTask]
+    ) -> List[AgentResult]:
+        """
+        Execute many tasks on one agent.
+        
+        Data analysis agents run the analyze node over the whole batch in
+        one vectorized pass (fleet ingest); other agents run each task
+        through their graph.
+        """
+        agent = self.agents.get(agent_id)
+        if not agent or agent["type"] != AgentType.DATA_ANALYSIS:
+            return [self.execute_task(agent_id, task) for task in tasks]
+        
+        start_time = time.time()
+        
+        try:
+            updates = self._analyze_batch([self._initial_state(task) for task in tasks])
+        except Exception as e:
+            return [self._error_result(agent_id, task, e, start_time) for task in tasks]
+        
+        return [
+            self._build_result(agent_id, task, update, start_time)
+            for task, update in zip(tasks, updates)
+        ]
+    
+    @staticmethod
+    def _initial_state(task: AgentTask) -> Dict[str, Any]:
+        """Prepare the initial graph state for a task"""
+        return {
+            "messages": [],
+            "input_data": task.input_data,
+            "output_data": {},
+            "status": "running",
+            "error": None
+        }
+    
+    @staticmethod
+    def _build_result(
+        agent_id: str,
+        task: AgentTask,
+        result_state: Dict[str, Any],
+        start_time: float,
+        cache_hit: bool = False
+    ) -> AgentResult:
+        """Convert a finished graph state into an AgentResult"""
+        execution_time = (time.time() - start_time) * 1000
+        
+        return AgentResult(
+            task_id=task.task_id,
+            agent_id=agent_id,
+            success=result_state.get("status") == "completed",
+            output=result_state.get("output_data", {}),
+            error=result_state.get("error"),
+            execution_time_ms=execution_time,
+            metadata={"framework": "langgraph", "cache_hit": cache_hit}
+        )
+    
+    @staticmethod
+    def _agent_not_found(agent_id: str, task: AgentTask) -> AgentResult:
+        """Result for a task sent to an unknown agent"""
+        return AgentResult(
+            task_id=task.task_id,
+            agent_id=agent_id,
+            success=False,
+            output={},
+            error=f"Agent {agent_id} not found"
+        )
+    
+    @staticmethod
+    def _error_result(
+        agent_id: str,
+        task: AgentTask,
+        error: Exception,
+        start_time: float
+    ) -> AgentResult:
+        """Result for a graph run that raised"""
+        execution_time = (time.time() - start_time) * 1000
+        logger.error(f"LangGraph execution error: {error}")
+        
+        return AgentResult(
+            task_id=task.task_id,
+            agent_id=agent_id,
+            success=False,
+            output={},
+            error=str(error),
+            execution_time_ms=execution_time
+        )
     
     def orchestrate_workflow(
         self,
@@ -286,35 +517,100 @@ class LangGraphAdapter(BaseAgentAdapter):
         """Orchestrate workflow using LangGraph"""
         results = []
         
-        for task in sorted(tasks, key=lambda t: t.priority):
+        for task in sort_tasks_by_priority(tasks):
             agent_id = self._find_agent_for_task(task)
             if agent_id:
                 result = self.execute_task(agent_id, task)
                 results.append(result)
             else:
-                results.append(AgentResult(
-                    task_id=task.task_id,
-                    agent_id="none",
-                    success=False,
-                    output={},
-                    error="No suitable agent found"
-                ))
+                results.append(self._no_agent_result(task))
         
         return results
     
-    def _find_agent_for_task(self, task: AgentTask) -> Optional[str]:
-        """Find appropriate agent for task"""
-        task_type_mapping = {
-            "analyze": AgentType.DATA_ANALYSIS,
-            "diagnose": AgentType.DIAGNOSIS,
-            "engage": AgentType.CUSTOMER_ENGAGEMENT,
-            "schedule": AgentType.SCHEDULING
-        }
+    def push(self, task: AgentTask):
+        """Queue a task that arrived incrementally, for the next drain()"""
+        heapq.heappush(self._pending, (task.priority, next(self._arrivals), task))
+    
+    def drain(self) -> List[AgentResult]:
+        """
+        Execute all pushed tasks in priority order.
+        
+        Ties run in arrival order, matching orchestrate_workflow's stable
+        sort. Tasks pushed while draining are picked up in the same call.
+        """
+        results = []
+        pending = self._pending
+        
+        while pending:
+            task = heapq.heappop(pending)[2]
+            agent_id = self._find_agent_for_task(task)
+            if agent_id:
+                results.append(self.execute_task(agent_id, task))
+            else:
+                results.append(self._no_agent_result(task))
+        
+        return results
+    
+    async def aorchestrate_workflow(
+        self,
+        tasks: List[AgentTask],
+        workflow_config: Dict[str, Any] = None
+    ) -> List[AgentResult]:
+        """
+        Orchestrate workflow with async graph runs.
+        
+        Priority tiers run in order; tasks sharing a priority run
+        concurrently with asyncio.gather.
+        """
+        results = []
         
-        target_type = task_type_mapping.get(task.task_type)
+        for _, tier in groupby(sort_tasks_by_priority(tasks), key=lambda t: t.priority):
+            results.extend(await asyncio.gather(*[self._aexecute_found(task) for task in tier]))
+        
+        return results
+    
+    async def _aexecute_found(self, task: AgentTask) -> AgentResult:
+        """Execute a task on the agent found for it, asynchronously"""
+        agent_id = self._find_agent_for_task(task)
+        if not agent_id:
+            return self._no_agent_result(task)
         
-        for agent_id, agent in self.agents.items():
-            if agent["type"] == target_type:
-                return agent_id
+        return await self.aexecute_task(agent_id, task)
+    
+    @staticmethod
+    def _no_agent_result(task: AgentTask) -> AgentResult:
+        """Result for a task that has no suitable agent"""
+        return AgentResult(
+            task_id=task.task_id,
+            agent_id="none",
+            success=False,
+            output={},
+            error="No suitable agent found"
+        )
+    
+    def _find_agent_for_task(self, task: AgentTask) -> Optional[str]:
+        """Find appropriate agent for task"""
+        agent_ids = self._type_index.get(_TASK_AGENT_TYPES.get(task.task_type))
+        if agent_ids:
+            return agent_ids[0]
         
-        return list(self.agents.keys())[0] if self.agents else None
+        return next(iter(self.agents), None)
+    
+    def shutdown(self):
+        """Cleanup and shutdown"""
+        super().shutdown()
+        self.graphs.clear()
+        self._type_index.clear()
+        self._pending.clear()
+        with self._result_cache_lock:
+            self._result_cache.clear()
+
+
+# Agent type -> (node name, node function) used to build its graph
+_NODE_SPECS = MappingProxyType({
+    AgentType.DATA_ANALYSIS: ("analyze", LangGraphAdapter._analyze_node),
+    AgentType.DIAGNOSIS: ("diagnose", LangGraphAdapter._diagnose_node),
+    AgentType.CUSTOMER_ENGAGEMENT: ("engage", LangGraphAdapter._engage_node),
+    AgentType.SCHEDULING: ("schedule", LangGraphAdapter._schedule_node)
+})
+_DEFAULT_NODE_SPEC = ("process", LangGraphAdapter._generic_node)
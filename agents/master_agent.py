@@ -7,20 +7,20 @@ import os
 import json
 import asyncio
 import logging
-from datetime import datetime
-from typing import Dict, Any, List, Optional
-import uuid
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Dict, Any, List, Optional, Tuple, Type, Union
 import httpx
 
+import adapters
 from adapters import (
     BaseAgentAdapter,
     AgentType,
     AgentTask,
     AgentResult,
-    BuiltinAdapter,
-    LangGraphAdapter,
-    CrewAIAdapter,
-    AutoGenAdapter
+    short_id,
+    iso_now,
+    BuiltinAdapter
 )
 
 # Configure logging
@@ -30,6 +30,86 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# AGENT_FRAMEWORK -> adapter class. Framework adapters are given by their
+# name in the adapters package so they're only imported when selected;
+# plugins may register classes directly.
+ADAPTER_REGISTRY: Dict[str, Union[str, Type[BaseAgentAdapter]]] = {
+    "builtin": BuiltinAdapter,
+    "langgraph": "LangGraphAdapter",
+    "crewai": "CrewAIAdapter",
+    "autogen": "AutoGenAdapter"
+}
+
+# Optional fast JSON encoding
+ORJSON_AVAILABLE = False
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    pass
+
+# HTTP/2 needs the optional h2 package (httpx[http2])
+HTTP2_AVAILABLE = False
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    pass
+
+_JSON_HEADERS = {"content-type": "application/json"}
+
+
+def _encode_json(payload: Any) -> bytes:
+    """Serialize a payload to compact UTF-8 JSON, as sent over HTTP"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(payload)
+    return json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode()
+
+
+def _is_nominal(analysis_result: AgentResult) -> bool:
+    """True when an analysis succeeded and every health indicator is good"""
+    if not analysis_result.success:
+        return False
+    
+    indicators = analysis_result.output.get("health_indicators")
+    return bool(indicators) and all(status == "good" for status in indicators.values())
+
+
+async def _timed(awaitable: Awaitable) -> Tuple[Any, float]:
+    """Await and return (result, elapsed milliseconds)"""
+    start = time.perf_counter()
+    result = await awaitable
+    return result, (time.perf_counter() - start) * 1000
+
+
+@dataclass(slots=True)
+class WorkflowRecord:
+    """Per-stage workflow results stored column-wise, one entry per stage"""
+    stage_names: List[str] = field(default_factory=list)
+    successes: List[bool] = field(default_factory=list)
+    latency_ms: List[float] = field(default_factory=list)
+    outputs: List[Dict[str, Any]] = field(default_factory=list)
+    
+    def append(self, stage: str, success: bool, latency_ms: float, output: Dict[str, Any]):
+        """Record one finished stage"""
+        self.stage_names.append(stage)
+        self.successes.append(success)
+        self.latency_ms.append(latency_ms)
+        self.outputs.append(output)
+    
+    def append_result(self, stage: str, result: AgentResult):
+        """Record a stage that ran as an agent task"""
+        self.append(stage, result.success, result.execution_time_ms, result.output)
+    
+    def to_dict(self) -> Dict[str, List]:
+        """Columns as a JSON-ready dict"""
+        return {
+            "stage_names": self.stage_names,
+            "successes": self.successes,
+            "latency_ms": self.latency_ms,
+            "outputs": self.outputs
+        }
+
 
 class MasterAgent:
     """
@@ -53,8 +133,29 @@ class MasterAgent:
         self.ueba_service_url = os.getenv("UEBA_SERVICE_URL", "http://localhost:5001")
         self.backend_url = os.getenv("BACKEND_URL", "http://localhost:4000")
         
-        # HTTP client
-        self.http_client = httpx.AsyncClient(timeout=30.0)
+        # HTTP client: one pooled client shared by all ML/UEBA calls, with
+        # keep-alive connections and HTTP/2 when the h2 extra is installed
+        self.http_client = httpx.AsyncClient(
+            timeout=httpx.Timeout(30.0, connect=5.0),
+            transport=httpx.AsyncHTTPTransport(
+                http2=HTTP2_AVAILABLE,
+                limits=httpx.Limits(
+                    max_connections=self.config.get("http_max_connections", 200),
+                    max_keepalive_connections=self.config.get("http_max_keepalive", 50),
+                    keepalive_expiry=30.0
+                ),
+                retries=2
+            )
+        )
+        
+        # Fire-and-forget UEBA reports, flushed in batches by a background task
+        self._ueba_queue: asyncio.Queue = asyncio.Queue()
+        self._ueba_worker: Optional[asyncio.Task] = None
+        self.ueba_batch_size = self.config.get("ueba_batch_size", 50)
+        self.ueba_flush_interval = self.config.get("ueba_flush_interval", 0.05)
+        
+        # Skip the ML prediction for healthy telemetry that UEBA doesn't flag
+        self.skip_ml_when_healthy = self.config.get("skip_ml_when_healthy", True)
         
         logger.info(f"Master Agent initialized: {self.agent_id}")
     
@@ -65,14 +166,10 @@ class MasterAgent:
         logger.info(f"Initializing agent framework: {framework}")
         
         # Select adapter based on framework
-        if framework == "langgraph":
-            self.adapter = LangGraphAdapter(self.config)
-        elif framework == "crewai":
-            self.adapter = CrewAIAdapter(self.config)
-        elif framework == "autogen":
-            self.adapter = AutoGenAdapter(self.config)
-        else:
-            self.adapter = BuiltinAdapter(self.config)
+        adapter_cls = ADAPTER_REGISTRY.get(framework, BuiltinAdapter)
+        if isinstance(adapter_cls, str):
+            adapter_cls = getattr(adapters, adapter_cls)
+        self.adapter = adapter_cls(self.config)
         
         # Initialize adapter
         if not self.adapter.initialize():
@@ -106,7 +203,8 @@ class MasterAgent:
         try:
             response = await self.http_client.post(
                 f"{self.ueba_service_url}/score",
-                json={"agent_action": action_data}
+                content=_encode_json({"agent_action": action_data}),
+                headers=_JSON_HEADERS
             )
             
             if response.status_code == 200:
@@ -119,12 +217,51 @@ class MasterAgent:
             logger.error(f"Failed to report to UEBA: {e}")
             return {"alert": False, "score": 0, "error": str(e)}
     
-    async def _get_ml_prediction(self, telemetry: Dict[str, Any]) -> Dict[str, Any]:
-        """Get prediction from ML service"""
+    def _enqueue_ueba(self, action_data: Dict[str, Any]):
+        """Queue an agent action for UEBA without waiting on the round-trip"""
+        if self._ueba_worker is None or self._ueba_worker.done():
+            self._ueba_worker = asyncio.create_task(self._drain_ueba())
+        
+        self._ueba_queue.put_nowait(action_data)
+    
+    async def _drain_ueba(self):
+        """Background task: POST queued UEBA reports in batches"""
+        while True:
+            batch = [await self._ueba_queue.get()]
+            
+            # Give concurrent workflows a moment to add to the batch
+            await asyncio.sleep(self.ueba_flush_interval)
+            while len(batch) < self.ueba_batch_size and not self._ueba_queue.empty():
+                batch.append(self._ueba_queue.get_nowait())
+            
+            try:
+                response = await self.http_client.post(
+                    f"{self.ueba_service_url}/score/batch",
+                    content=_encode_json({"actions": batch}),
+                    headers=_JSON_HEADERS
+                )
+                
+                if response.status_code != 200:
+                    logger.warning(f"UEBA batch response: {response.status_code}")
+                    
+            except Exception as e:
+                logger.error(f"Failed to report batch of {len(batch)} to UEBA: {e}")
+            
+            finally:
+                for _ in batch:
+                    self._ueba_queue.task_done()
+    
+    async def _get_ml_prediction(
+        self,
+        telemetry: Dict[str, Any],
+        telemetry_json: Optional[bytes] = None
+    ) -> Dict[str, Any]:
+        """Get prediction from ML service (telemetry_json: already-encoded body)"""
         try:
             response = await self.http_client.post(
                 f"{self.ml_service_url}/predict",
-                json=telemetry
+                content=telemetry_json or _encode_json(telemetry),
+                headers=_JSON_HEADERS
             )
             
             if response.status_code == 200:
@@ -144,55 +281,76 @@ class MasterAgent:
         This is the main entry point for real-time vehicle monitoring.
         """
         vehicle_id = telemetry.get("vehicle_id", "unknown")
-        workflow_id = f"WF-{uuid.uuid4().hex[:8].upper()}"
+        workflow_id = short_id("WF")
         
         logger.info(f"Processing telemetry for vehicle {vehicle_id} - Workflow: {workflow_id}")
         
         results = {
             "workflow_id": workflow_id,
             "vehicle_id": vehicle_id,
-            "timestamp": datetime.now().isoformat(),
-            "stages": {}
+            "timestamp": iso_now()
         }
+        record = WorkflowRecord()
         
         try:
-            # Stage 1: Report to UEBA
-            ueba_result = await self._report_to_ueba({
+            # Stages 1-3: UEBA report, data analysis and ML prediction. The
+            # UEBA report is in flight while analysis runs; a healthy
+            # analysis with no UEBA alert skips the ML round-trip
+            analysis_task = AgentTask(
+                task_id=f"{workflow_id}-analysis",
+                task_type="analyze",
+                description=f"Analyze telemetry data for vehicle {vehicle_id}",
+                input_data={"telemetry": telemetry},
+                priority=1
+            )
+            
+            # Encoded once: sized for UEBA and reused as the ML request body
+            telemetry_json = _encode_json(telemetry)
+            
+            ueba_call = asyncio.ensure_future(_timed(self._report_to_ueba({
                 "agent_id": self.agent_id,
                 "agent_type": "master",
                 "action_type": "query",
                 "target_entity": "telemetry",
                 "vehicle_id": vehicle_id,
-                "payload_size": len(json.dumps(telemetry)),
+                "payload_size": len(telemetry_json),
                 "response_time_ms": 0,
                 "success": True
-            })
-            results["stages"]["ueba_check"] = ueba_result
+            })))
+            try:
+                analysis_result = await self.adapter.aexecute_task(
+                    self.worker_agents["data_analysis"],
+                    analysis_task
+                )
+            except BaseException:
+                ueba_call.cancel()
+                raise
+            
+            skip_prediction = self.skip_ml_when_healthy and _is_nominal(analysis_result)
+            if skip_prediction:
+                ueba_result, ueba_ms = await ueba_call
+                skip_prediction = not ueba_result.get("alert")
+            
+            if skip_prediction:
+                prediction = {}
+            else:
+                (ueba_result, ueba_ms), (prediction, prediction_ms) = await asyncio.gather(
+                    ueba_call,
+                    _timed(self._get_ml_prediction(telemetry, telemetry_json))
+                )
+            
+            # Stage 1: UEBA check
+            record.append("ueba_check", "error" not in ueba_result, ueba_ms, ueba_result)
             
             if ueba_result.get("alert"):
                 logger.warning(f"UEBA alert triggered for workflow {workflow_id}")
             
             # Stage 2: Data Analysis
-            analysis_task = AgentTask(
-                task_id=f"{workflow_id}-analysis",
-                task_type="analyze",
-                description=f"Analyze telemetry data for vehicle {vehicle_id}",
-                input_data={"telemetry": telemetry},
-                priority=1
-            )
-            
-            analysis_result = self.adapter.execute_task(
-                self.worker_agents["data_analysis"],
-                analysis_task
-            )
-            results["stages"]["analysis"] = {
-                "success": analysis_result.success,
-                "output": analysis_result.output
-            }
+            record.append_result("analysis", analysis_result)
             
             # Stage 3: ML Prediction
-            prediction = await self._get_ml_prediction(telemetry)
-            results["stages"]["prediction"] = prediction
+            if not skip_prediction:
+                record.append("prediction", "error" not in prediction, prediction_ms, prediction)
             
             # Stage 4: Diagnosis (if issues detected)
             needs_diagnosis = (
@@ -212,21 +370,18 @@ class MasterAgent:
                     priority=1
                 )
                 
-                diagnosis_result = self.adapter.execute_task(
+                diagnosis_result = await self.adapter.aexecute_task(
                     self.worker_agents["diagnosis"],
                     diagnosis_task
                 )
-                results["stages"]["diagnosis"] = {
-                    "success": diagnosis_result.success,
-                    "output": diagnosis_result.output
-                }
+                record.append_result("diagnosis", diagnosis_result)
                 
                 # Stage 5: Schedule service if needed
                 severity = diagnosis_result.output.get("severity", "low")
                 if severity in ["high", "critical", "medium"]:
                     await self._initiate_service_workflow(
                         workflow_id, vehicle_id, telemetry, 
-                        diagnosis_result.output, results
+                        diagnosis_result.output, record
                     )
             
             results["status"] = "completed"
@@ -237,6 +392,7 @@ class MasterAgent:
             results["status"] = "failed"
             results["error"] = str(e)
         
+        results["stages"] = record.to_dict()
         return results
     
     async def _initiate_service_workflow(
@@ -245,7 +401,7 @@ class MasterAgent:
         vehicle_id: str,
         telemetry: Dict[str, Any],
         diagnosis: Dict[str, Any],
-        results: Dict[str, Any]
+        record: WorkflowRecord
     ):
         """Initiate customer engagement and scheduling workflow"""
         
@@ -270,15 +426,6 @@ class MasterAgent:
             priority=2
         )
         
-        engage_result = self.adapter.execute_task(
-            self.worker_agents["customer_engagement"],
-            engage_task
-        )
-        results["stages"]["engagement"] = {
-            "success": engage_result.success,
-            "output": engage_result.output
-        }
-        
         # Stage: Scheduling
         schedule_task = AgentTask(
             task_id=f"{workflow_id}-schedule",
@@ -292,23 +439,28 @@ class MasterAgent:
             priority=2
         )
         
-        schedule_result = self.adapter.execute_task(
-            self.worker_agents["scheduling"],
-            schedule_task
+        # Engagement and scheduling don't depend on each other
+        engage_result, schedule_result = await asyncio.gather(
+            self.adapter.aexecute_task(
+                self.worker_agents["customer_engagement"],
+                engage_task
+            ),
+            self.adapter.aexecute_task(
+                self.worker_agents["scheduling"],
+                schedule_task
+            )
         )
-        results["stages"]["scheduling"] = {
-            "success": schedule_result.success,
-            "output": schedule_result.output
-        }
+        record.append_result("engagement", engage_result)
+        record.append_result("scheduling", schedule_result)
         
         # Report scheduling action to UEBA
-        await self._report_to_ueba({
+        self._enqueue_ueba({
             "agent_id": self.worker_agents["scheduling"],
             "agent_type": "scheduling",
             "action_type": "schedule",
             "target_entity": "appointment",
             "vehicle_id": vehicle_id,
-            "payload_size": len(json.dumps(schedule_result.output)),
+            "payload_size": len(_encode_json(schedule_result.output)),
             "response_time_ms": schedule_result.execution_time_ms,
             "success": schedule_result.success
         })
@@ -322,7 +474,7 @@ class MasterAgent:
         """Generate RCA/CAPA report for manufacturing insights"""
         
         task = AgentTask(
-            task_id=f"RCA-{uuid.uuid4().hex[:8].upper()}",
+            task_id=short_id("RCA"),
             task_type="rca_capa",
             description=f"Generate RCA/CAPA for vehicle {vehicle_id}",
             input_data={
@@ -333,19 +485,19 @@ class MasterAgent:
             priority=3
         )
         
-        result = self.adapter.execute_task(
+        result = await self.adapter.aexecute_task(
             self.worker_agents["rca_capa"],
             task
         )
         
         # Report to UEBA
-        await self._report_to_ueba({
+        self._enqueue_ueba({
             "agent_id": self.worker_agents["rca_capa"],
             "agent_type": "rca_capa",
             "action_type": "generate",
             "target_entity": "capa_report",
             "vehicle_id": vehicle_id,
-            "payload_size": len(json.dumps(result.output)),
+            "payload_size": len(_encode_json(result.output)),
             "response_time_ms": result.execution_time_ms,
             "success": result.success
         })
@@ -363,7 +515,7 @@ class MasterAgent:
         """Initiate feedback collection workflow"""
         
         task = AgentTask(
-            task_id=f"FB-{uuid.uuid4().hex[:8].upper()}",
+            task_id=short_id("FB"),
             task_type="feedback",
             description=f"Collect feedback for appointment {appointment_id}",
             input_data={
@@ -373,7 +525,7 @@ class MasterAgent:
             priority=4
         )
         
-        result = self.adapter.execute_task(
+        result = await self.adapter.aexecute_task(
             self.worker_agents["feedback"],
             task
         )
@@ -390,6 +542,14 @@ class MasterAgent:
         if self.adapter:
             self.adapter.shutdown()
         
+        # Flush queued UEBA reports before closing the client
+        if self._ueba_worker is not None:
+            try:
+                await asyncio.wait_for(self._ueba_queue.join(), timeout=5.0)
+            except asyncio.TimeoutError:
+                logger.warning("Timed out flushing UEBA reports")
+            self._ueba_worker.cancel()
+        
         await self.http_client.aclose()
 
 
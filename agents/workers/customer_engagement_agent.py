@@ -6,10 +6,15 @@ Handles proactive customer notifications and communications
 import os
 import json
 import asyncio
-from datetime import datetime, timedelta
-from typing import Dict, Any, List, Optional
-from dataclasses import dataclass, field
+import functools
+import string
+import time
+from collections import OrderedDict, deque
+from datetime import date, datetime, timedelta, timezone
+from typing import Deque, Dict, Any, List, Mapping, Optional, Tuple
+from dataclasses import asdict, dataclass, field, is_dataclass
 from enum import Enum
+from types import MappingProxyType
 import httpx
 
 # Import shared types
@@ -17,6 +22,109 @@ import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from adapters import AgentType, ActionType, AgentTask, AgentResult
 
+# Optional fast JSON encoding
+ORJSON_AVAILABLE = False
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    pass
+
+_JSON_HEADERS = {"content-type": "application/json"}
+
+
+def _json_default(value: Any) -> Any:
+    """json.dumps fallback for dataclasses and enums (orjson handles both)"""
+    if is_dataclass(value):
+        return asdict(value)
+    if isinstance(value, Enum):
+        return value.value
+    return str(value)
+
+
+def _encode_json(payload: Any) -> bytes:
+    """Serialize a payload to compact UTF-8 JSON, as sent over HTTP"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(payload, default=str)
+    return json.dumps(
+        payload, default=_json_default, separators=(",", ":"), ensure_ascii=False
+    ).encode()
+
+
+def _fail_deliveries(queue: asyncio.Queue, batch: List[Tuple[Any, asyncio.Future]], error: Exception) -> None:
+    """Fail every unresolved delivery in a batch and a channel queue"""
+    pending = list(batch)
+    while not queue.empty():
+        pending.append(queue.get_nowait())
+    for _, result in pending:
+        if not result.done():
+            result.set_exception(error)
+
+
+# (epoch second, "%Y%m%d%H%M%S" UTC string for it) behind _utc_id_stamp
+_id_stamp_second = (None, "")
+
+
+def _utc_id_stamp() -> str:
+    """Current UTC time as YYYYmmddHHMMSS, formatted once per second"""
+    global _id_stamp_second
+    second = int(time.time())
+    cached_second, stamp = _id_stamp_second
+    if second != cached_second:
+        stamp = datetime.fromtimestamp(second, timezone.utc).strftime("%Y%m%d%H%M%S")
+        _id_stamp_second = (second, stamp)
+    return stamp
+
+
+@functools.lru_cache(maxsize=1)
+def _available_slots_text(today_ordinal: int) -> str:
+    """Appointment slot lines for the three days after the given date"""
+    return "\n".join(
+        f"• {date.fromordinal(today_ordinal + i).strftime('%A, %B %d')}: 9:00 AM, 2:00 PM, 4:00 PM"
+        for i in range(1, 4)
+    )
+
+
+# A template pre-split into (literal text, placeholder name or None,
+# "{name}" text to keep when the value is missing) segments
+CompiledTemplate = Tuple[Tuple[str, Optional[str], str], ...]
+
+
+def _compile_template(text: str) -> CompiledTemplate:
+    """Split a {placeholder} template once, so rendering needn't parse it"""
+    segments = []
+    for literal, name, spec, conversion in string.Formatter().parse(text):
+        if name is not None and (not name.isidentifier() or spec or conversion):
+            # Rendering is a plain keyed lookup; anything fancier would be dropped
+            raise ValueError(f"Unsupported placeholder {{{name}}}")
+        segments.append((literal, name, "{" + name + "}" if name is not None else ""))
+    return tuple(segments)
+
+
+def _render_template(template: CompiledTemplate, data: Dict) -> str:
+    """Fill a compiled template; unknown placeholders are left as-is"""
+    get = data.get
+    return "".join([
+        literal + str(get(name, placeholder)) if name is not None else literal
+        for literal, name, placeholder in template
+    ])
+
+
+def _compile_templates(
+    templates: Mapping[str, Dict]
+) -> Dict[Tuple[str, bool], Tuple[CompiledTemplate, CompiledTemplate]]:
+    """(template name, is SMS) -> compiled (subject, body) for that channel"""
+    compiled = {}
+    for name, template in templates.items():
+        try:
+            subject = _compile_template(template.get("subject", "AutoSentry Notification"))
+            body = template.get("body", "")
+            compiled[(name, False)] = (subject, _compile_template(body))
+            compiled[(name, True)] = (subject, _compile_template(template.get("sms", body)))
+        except ValueError as e:
+            raise ValueError(f"Invalid notification template '{name}': {e}") from e
+    return compiled
+
 
 class NotificationChannel(Enum):
     """Communication channels"""
@@ -45,7 +153,14 @@ class NotificationType(Enum):
     SURVEY = "survey"
 
 
-@dataclass
+# Value string -> enum member, for hot paths that would otherwise go
+# through the Enum constructor per lookup
+_CHANNELS = MappingProxyType({c.value: c for c in NotificationChannel})
+_TYPES = MappingProxyType({t.value: t for t in NotificationType})
+_PRIORITIES = MappingProxyType({p.value: p for p in NotificationPriority})
+
+
+@dataclass(slots=True)
 class CustomerProfile:
     """Customer profile for personalization"""
     customer_id: str
@@ -58,7 +173,7 @@ class CustomerProfile:
     vehicle_ids: List[str] = field(default_factory=list)
 
 
-@dataclass
+@dataclass(slots=True)
 class Notification:
     """Notification message"""
     notification_id: str
@@ -76,44 +191,34 @@ class Notification:
     metadata: Dict[str, Any] = field(default_factory=dict)
 
 
-class CustomerEngagementAgent:
-    """
-    Customer Engagement Agent - Worker Agent #3
+class NotificationLog:
+    """A customer's most recent notifications, stored as one column per field"""
     
-    Responsibilities:
-    - Send proactive maintenance alerts to customers
-    - Personalize communication based on customer preferences
-    - Multi-channel communication (email, SMS, push, in-app)
-    - Schedule follow-up reminders
-    - Collect customer responses
-    - Handle appointment confirmations
-    """
+    __slots__ = ("channels", "delivered", "read", "timestamps")
     
-    def __init__(self):
-        self.agent_type = AgentType.CUSTOMER_ENGAGEMENT
-        self.backend_url = os.getenv("BACKEND_URL", "http://localhost:3000")
-        
-        # Notification templates
-        self.templates = self._load_templates()
-        
-        # Rate limiting
-        self.rate_limits = {
-            NotificationChannel.EMAIL: 10,  # per hour
-            NotificationChannel.SMS: 5,
-            NotificationChannel.PUSH: 20,
-            NotificationChannel.IN_APP: 50,
-            NotificationChannel.CALL: 2
-        }
-        
-        # Notification history for deduplication
-        self._notification_history: Dict[str, List[Notification]] = {}
-        
-    def _load_templates(self) -> Dict[str, Dict]:
-        """Load notification templates"""
-        return {
-            "critical_alert": {
-                "subject": "🚨 URGENT: {vehicle_name} Requires Immediate Attention",
-                "body": """Dear {customer_name},
+    def __init__(self, maxlen: int = 100):
+        self.channels: Deque[NotificationChannel] = deque(maxlen=maxlen)
+        self.delivered: Deque[bool] = deque(maxlen=maxlen)
+        self.read: Deque[bool] = deque(maxlen=maxlen)
+        self.timestamps: Deque[str] = deque(maxlen=maxlen)
+    
+    def append(self, notification: Notification) -> None:
+        """Record a notification, evicting the oldest once full"""
+        self.channels.append(notification.channel)
+        self.delivered.append(notification.delivered)
+        self.read.append(notification.read)
+        self.timestamps.append(notification.timestamp)
+    
+    def __len__(self) -> int:
+        return len(self.channels)
+
+
+# Notification templates: name -> subject, body and SMS text with
+# {placeholder} fields
+_TEMPLATES = MappingProxyType({
+    "critical_alert": {
+        "subject": "🚨 URGENT: {vehicle_name} Requires Immediate Attention",
+        "body": """Dear {customer_name},
 
 Our AI system has detected a CRITICAL issue with your {vehicle_name} ({vehicle_id}):
 
@@ -139,12 +244,12 @@ Your safety is our priority.
 
 Best regards,
 AutoSentry AI Team""",
-                "sms": "🚨 URGENT: Your {vehicle_name} needs immediate service. Issue: {primary_issue}. Call 1-800-AUTO-HELP or confirm appointment: {short_link}"
-            },
-            
-            "high_priority_alert": {
-                "subject": "⚠️ Important: Maintenance Required for {vehicle_name}",
-                "body": """Dear {customer_name},
+        "sms": "🚨 URGENT: Your {vehicle_name} needs immediate service. Issue: {primary_issue}. Call 1-800-AUTO-HELP or confirm appointment: {short_link}"
+    },
+
+    "high_priority_alert": {
+        "subject": "⚠️ Important: Maintenance Required for {vehicle_name}",
+        "body": """Dear {customer_name},
 
 Our predictive maintenance system has identified an issue that needs attention within 24 hours:
 
@@ -174,12 +279,12 @@ Thank you for trusting AutoSentry.
 
 Best regards,
 AutoSentry AI Team""",
-                "sms": "⚠️ {vehicle_name} needs service within 24hrs. Issue: {primary_issue}. Book now: {short_link}"
-            },
-            
-            "maintenance_reminder": {
-                "subject": "🔧 Scheduled Maintenance Due for {vehicle_name}",
-                "body": """Dear {customer_name},
+        "sms": "⚠️ {vehicle_name} needs service within 24hrs. Issue: {primary_issue}. Book now: {short_link}"
+    },
+
+    "maintenance_reminder": {
+        "subject": "🔧 Scheduled Maintenance Due for {vehicle_name}",
+        "body": """Dear {customer_name},
 
 This is a friendly reminder that your {vehicle_name} is due for scheduled maintenance:
 
@@ -202,12 +307,12 @@ Need assistance? Reply to this email or call us at 1-800-AUTO-HELP.
 
 Drive safe!
 AutoSentry AI Team""",
-                "sms": "🔧 Reminder: {vehicle_name} is due for {service_type}. Book your service: {short_link}"
-            },
-            
-            "appointment_confirmation": {
-                "subject": "✅ Appointment Confirmed - {vehicle_name} Service",
-                "body": """Dear {customer_name},
+        "sms": "🔧 Reminder: {vehicle_name} is due for {service_type}. Book your service: {short_link}"
+    },
+
+    "appointment_confirmation": {
+        "subject": "✅ Appointment Confirmed - {vehicle_name} Service",
+        "body": """Dear {customer_name},
 
 Your service appointment has been confirmed!
 
@@ -239,12 +344,12 @@ We look forward to serving you!
 
 Best regards,
 AutoSentry AI Team""",
-                "sms": "✅ Confirmed: Service for {vehicle_name} on {appointment_date} at {appointment_time}. Location: {service_center}. Details: {short_link}"
-            },
-            
-            "service_complete": {
-                "subject": "🎉 Service Complete - {vehicle_name} is Ready!",
-                "body": """Dear {customer_name},
+        "sms": "✅ Confirmed: Service for {vehicle_name} on {appointment_date} at {appointment_time}. Location: {service_center}. Details: {short_link}"
+    },
+
+    "service_complete": {
+        "subject": "🎉 Service Complete - {vehicle_name} is Ready!",
+        "body": """Dear {customer_name},
 
 Great news! The service for your {vehicle_name} has been completed.
 
@@ -272,12 +377,12 @@ Thank you for choosing AutoSentry!
 
 Best regards,
 AutoSentry AI Team""",
-                "sms": "🎉 Your {vehicle_name} service is complete! Health Score: {health_score}%. Ready for pickup at {service_center}. Invoice: {short_link}"
-            },
-            
-            "feedback_request": {
-                "subject": "📝 How was your service experience?",
-                "body": """Dear {customer_name},
+        "sms": "🎉 Your {vehicle_name} service is complete! Health Score: {health_score}%. Ready for pickup at {service_center}. Invoice: {short_link}"
+    },
+
+    "feedback_request": {
+        "subject": "📝 How was your service experience?",
+        "body": """Dear {customer_name},
 
 Thank you for choosing AutoSentry for your recent service visit!
 
@@ -298,12 +403,12 @@ Your feedback is valuable to us!
 
 Best regards,
 AutoSentry AI Team""",
-                "sms": "📝 How was your {vehicle_name} service? Rate us: {short_link}"
-            },
-            
-            "promotion": {
-                "subject": "🎁 Special Offer for {vehicle_name} Owners!",
-                "body": """Dear {customer_name},
+        "sms": "📝 How was your {vehicle_name} service? Rate us: {short_link}"
+    },
+
+    "promotion": {
+        "subject": "🎁 Special Offer for {vehicle_name} Owners!",
+        "body": """Dear {customer_name},
 
 We have an exclusive offer just for you!
 
@@ -322,13 +427,150 @@ Terms and conditions apply. See details at {terms_link}.
 
 Best regards,
 AutoSentry AI Team""",
-                "sms": "🎁 Special offer for your {vehicle_name}! {promotion_title}. Claim: {short_link}"
-            }
-        }
+        "sms": "🎁 Special offer for your {vehicle_name}! {promotion_title}. Claim: {short_link}"
+    }
+})
+
+# Compiled once at import and shared by every agent
+_COMPILED_TEMPLATES = MappingProxyType(_compile_templates(_TEMPLATES))
+
+# Notifications allowed per channel per customer per hour
+_RATE_LIMITS = MappingProxyType({
+    NotificationChannel.EMAIL: 10,
+    NotificationChannel.SMS: 5,
+    NotificationChannel.PUSH: 20,
+    NotificationChannel.IN_APP: 50,
+    NotificationChannel.CALL: 2
+})
+
+# Preference key that gates each notification type
+_TYPE_TO_PREF = MappingProxyType({
+    "alert": "alerts",
+    "reminder": "reminders",
+    "promotion": "promotions",
+    "survey": "surveys",
+    "confirmation": "alerts",
+    "update": "alerts"
+})
+
+# Notification settings per diagnosis severity
+_SEVERITY_CONFIGS = MappingProxyType({
+    "critical": MappingProxyType({
+        "template": "critical_alert",
+        "type": "alert",
+        "priority": "critical",
+        "channels": ("push", "sms", "email", "in_app"),
+        "follow_up_hours": 4
+    }),
+    "major": MappingProxyType({
+        "template": "high_priority_alert",
+        "type": "alert",
+        "priority": "high",
+        "channels": ("push", "email", "in_app"),
+        "follow_up_hours": 24
+    }),
+    "moderate": MappingProxyType({
+        "template": "maintenance_reminder",
+        "type": "reminder",
+        "priority": "medium",
+        "channels": ("email", "in_app"),
+        "follow_up_hours": 72
+    }),
+    "minor": MappingProxyType({
+        "template": "maintenance_reminder",
+        "type": "reminder",
+        "priority": "low",
+        "channels": ("in_app",),
+        "follow_up_hours": 168  # 1 week
+    })
+})
+
+
+class CustomerEngagementAgent:
+    """
+    Customer Engagement Agent - Worker Agent #3
+    
+    Responsibilities:
+    - Send proactive maintenance alerts to customers
+    - Personalize communication based on customer preferences
+    - Multi-channel communication (email, SMS, push, in-app)
+    - Schedule follow-up reminders
+    - Collect customer responses
+    - Handle appointment confirmations
+    """
+    
+    def __init__(self):
+        self.agent_type = AgentType.CUSTOMER_ENGAGEMENT
+        self.backend_url = os.getenv("BACKEND_URL", "http://localhost:3000")
+        
+        # One pooled client for all backend calls, so deliveries reuse
+        # keep-alive connections instead of handshaking per request
+        self.http_client = httpx.AsyncClient(
+            base_url=self.backend_url,
+            timeout=httpx.Timeout(5.0),
+            limits=httpx.Limits(max_connections=128, max_keepalive_connections=32)
+        )
+        
+        # Notification templates and rate limits (shared, read-only)
+        self.templates = _TEMPLATES
+        self.rate_limits = _RATE_LIMITS
+        
+        # Last 100 notifications per customer, for engagement metrics
+        self._notification_history: Dict[str, NotificationLog] = {}
+        
+        # (customer_id, channel) -> monotonic send times, newest last. Only
+        # the last rate-limit's worth of sends matters, so each is bounded
+        self._rate_windows: Dict[Tuple[str, NotificationChannel], Deque[float]] = {}
+        
+        # (customer, template, primary issue, vehicle) -> monotonic time an
+        # alert was last delivered, oldest first; repeats within the window
+        # are suppressed
+        self._recent_sends: "OrderedDict[Tuple[str, str, str, str], float]" = OrderedDict()
+        self.dedup_window_seconds = 300
+        self.dedup_max_entries = 10000
+        
+        # Per-channel delivery batching: notifications queued within a flush
+        # interval go out in one bulk request per channel. Each (queue,
+        # worker) pair belongs to the event loop that created it
+        self._delivery_channels: Dict[NotificationChannel, Tuple[asyncio.Queue, asyncio.Task]] = {}
+        self.delivery_batch_size = 50
+        self.delivery_flush_interval = 0.05
+        
+        # customer_id -> (monotonic expiry, profile), oldest first. Misses
+        # arriving within the batch wait share one bulk backend fetch
+        self._profile_cache: "OrderedDict[str, Tuple[float, CustomerProfile]]" = OrderedDict()
+        self._pending_profiles: Dict[str, asyncio.Future] = {}
+        self._profile_flush: Optional[asyncio.Task] = None
+        self.profile_cache_ttl_seconds = 300
+        self.profile_cache_size = 10000
+        self.profile_batch_wait = 0.02
+        
+    async def __aenter__(self) -> "CustomerEngagementAgent":
+        return self
+    
+    async def __aexit__(self, *exc_info) -> None:
+        await self.shutdown()
+    
+    async def shutdown(self):
+        """Stop delivery workers and close the shared HTTP client"""
+        loop = asyncio.get_running_loop()
+        error = RuntimeError("Customer engagement agent shut down")
+        for queue, worker in self._delivery_channels.values():
+            worker.cancel()
+            # Queues from a finished loop have no one left waiting on them
+            if worker.get_loop() is loop:
+                _fail_deliveries(queue, [], error)
+        self._delivery_channels.clear()
+        
+        if self._profile_flush is not None:
+            self._profile_flush.cancel()
+            self._profile_flush = None
+        
+        await self.http_client.aclose()
     
     async def execute(self, task: AgentTask) -> AgentResult:
         """Execute customer engagement task"""
-        start_time = datetime.utcnow()
+        start_time = time.perf_counter()
         
         try:
             action = task.action
@@ -348,7 +590,7 @@ AutoSentry AI Team""",
                 agent_type=self.agent_type,
                 success=True,
                 result=result,
-                execution_time=(datetime.utcnow() - start_time).total_seconds()
+                execution_time=time.perf_counter() - start_time
             )
             
         except Exception as e:
@@ -358,7 +600,7 @@ AutoSentry AI Team""",
                 success=False,
                 result={"error": str(e)},
                 error=str(e),
-                execution_time=(datetime.utcnow() - start_time).total_seconds()
+                execution_time=time.perf_counter() - start_time
             )
     
     async def _send_notification(self, payload: Dict[str, Any]) -> Dict[str, Any]:
@@ -383,6 +625,15 @@ AutoSentry AI Team""",
                 "reason": "Customer has disabled this notification type"
             }
         
+        # Drop channels the customer has turned off before any content work
+        channel_preferences = customer.notification_preferences
+        channels = [c for c in channels if channel_preferences.get(f"{c}_enabled", True)]
+        if not channels:
+            return {
+                "status": "no_enabled_channels",
+                "reason": "Customer has disabled all requested channels"
+            }
+        
         # Check rate limiting
         if not self._check_rate_limit(customer_id, channels):
             return {
@@ -390,50 +641,81 @@ AutoSentry AI Team""",
                 "reason": "Rate limit exceeded, notification queued"
             }
         
-        # Generate notification content
-        notifications_sent = []
+        # Suppress repeats of the same alert (retries, concurrent diagnoses)
+        dedup_key = None
+        if notification_type == "alert":
+            dedup_key = (customer_id, template_name, template_data.get("primary_issue", ""), vehicle_id)
+            if self._is_duplicate(dedup_key):
+                return {
+                    "status": "duplicate_suppressed",
+                    "reason": "Same notification sent recently"
+                }
+        
+        # Prepare template data with customer info
+        full_template_data = {
+            "customer_name": customer.name,
+            "customer_id": customer_id,
+            "vehicle_id": vehicle_id,
+            **template_data
+        }
         
+        # Generate one notification per channel
+        notification_kind = _TYPES[notification_type]
+        notification_priority = _PRIORITIES[priority]
+        # One timestamp for every channel's copy of this notification
+        id_stamp = _utc_id_stamp()
+        timestamp = datetime.utcnow().isoformat()
+        # Every non-SMS channel gets the same content, so render it once
+        contents: Dict[bool, Dict] = {}
+        notifications = []
         for channel_str in channels:
-            channel = NotificationChannel(channel_str)
+            channel = _CHANNELS[channel_str]
+            is_sms = channel is NotificationChannel.SMS
+            content = contents.get(is_sms)
+            if content is None:
+                content = contents[is_sms] = self._generate_content(
+                    template_name, channel, full_template_data
+                )
             
-            # Prepare template data with customer info
-            full_template_data = {
-                "customer_name": customer.name,
-                "customer_id": customer_id,
-                "vehicle_id": vehicle_id,
-                **template_data
-            }
-            
-            # Generate content from template
-            content = self._generate_content(template_name, channel, full_template_data)
-            
-            # Create notification
-            notification = Notification(
-                notification_id=f"NOTIF-{datetime.utcnow().strftime('%Y%m%d%H%M%S')}-{channel.value}",
+            notifications.append(Notification(
+                notification_id=f"NOTIF-{id_stamp}-{channel.value}",
                 customer_id=customer_id,
                 vehicle_id=vehicle_id,
                 channel=channel,
-                type=NotificationType(notification_type),
-                priority=NotificationPriority(priority),
+                type=notification_kind,
+                priority=notification_priority,
                 subject=content.get("subject", "AutoSentry Notification"),
                 body=content.get("body", ""),
-                timestamp=datetime.utcnow().isoformat(),
+                timestamp=timestamp,
                 metadata=template_data
-            )
-            
-            # Send notification
-            send_result = await self._deliver_notification(notification)
+            ))
+        
+        # Deliver on all channels concurrently; a failed channel doesn't
+        # stop the others
+        send_results = await asyncio.gather(
+            *(self._deliver_notification(notification) for notification in notifications),
+            return_exceptions=True
+        )
+        
+        notifications_sent = []
+        for notification, send_result in zip(notifications, send_results):
+            if isinstance(send_result, Exception):
+                send_result = {"delivered": False}
             
             # Track notification
             self._track_notification(customer_id, notification)
             
             notifications_sent.append({
                 "notification_id": notification.notification_id,
-                "channel": channel.value,
+                "channel": notification.channel.value,
                 "delivered": send_result.get("delivered", False),
                 "message_id": send_result.get("message_id")
             })
         
+        # Only a send that reached the customer blocks its repeats
+        if dedup_key is not None and any(sent["delivered"] for sent in notifications_sent):
+            self._record_send(dedup_key)
+        
         return {
             "status": "sent",
             "customer_id": customer_id,
@@ -508,39 +790,9 @@ AutoSentry AI Team""",
             "customer_contacted": result.get("status") == "sent"
         }
     
-    def _get_notification_config(self, severity: str, diagnosis: Dict) -> Dict:
+    def _get_notification_config(self, severity: str, diagnosis: Dict) -> Mapping[str, Any]:
         """Get notification configuration based on severity"""
-        configs = {
-            "critical": {
-                "template": "critical_alert",
-                "type": "alert",
-                "priority": "critical",
-                "channels": ["push", "sms", "email", "in_app"],
-                "follow_up_hours": 4
-            },
-            "major": {
-                "template": "high_priority_alert",
-                "type": "alert",
-                "priority": "high",
-                "channels": ["push", "email", "in_app"],
-                "follow_up_hours": 24
-            },
-            "moderate": {
-                "template": "maintenance_reminder",
-                "type": "reminder",
-                "priority": "medium",
-                "channels": ["email", "in_app"],
-                "follow_up_hours": 72
-            },
-            "minor": {
-                "template": "maintenance_reminder",
-                "type": "reminder",
-                "priority": "low",
-                "channels": ["in_app"],
-                "follow_up_hours": 168  # 1 week
-            }
-        }
-        return configs.get(severity, configs["minor"])
+        return _SEVERITY_CONFIGS.get(severity, _SEVERITY_CONFIGS["minor"])
     
     def _format_diagnosis_summary(self, diagnosis: Dict) -> str:
         """Format diagnosis for notification"""
@@ -573,109 +825,216 @@ AutoSentry AI Team""",
     
     def _format_available_slots(self) -> str:
         """Format available appointment slots"""
-        now = datetime.utcnow()
-        slots = []
+        # Only changes when the UTC date does
+        return _available_slots_text(datetime.utcnow().toordinal())
+    
+    async def _get_customer_profile(self, customer_id: str) -> Optional[CustomerProfile]:
+        """Get customer profile, from cache or the next bulk backend fetch"""
+        cached = self._profile_cache.get(customer_id)
+        if cached is not None:
+            expires_at, profile = cached
+            if time.monotonic() < expires_at:
+                return profile
+            del self._profile_cache[customer_id]
         
-        for i in range(3):
-            date = now + timedelta(days=i+1)
-            slots.append(f"• {date.strftime('%A, %B %d')}: 9:00 AM, 2:00 PM, 4:00 PM")
+        pending = self._pending_profiles.get(customer_id)
+        if pending is None:
+            pending = asyncio.get_running_loop().create_future()
+            self._pending_profiles[customer_id] = pending
+            if self._profile_flush is None or self._profile_flush.done():
+                self._profile_flush = asyncio.create_task(self._flush_profiles())
         
-        return "\n".join(slots)
+        # Shielded so one cancelled caller doesn't fail the others waiting
+        return await asyncio.shield(pending)
     
-    async def _get_customer_profile(self, customer_id: str) -> Optional[CustomerProfile]:
-        """Get customer profile from backend"""
-        # In production, this would fetch from the backend
-        # For demo, return mock profile
-        return CustomerProfile(
-            customer_id=customer_id,
-            name="John Doe",
-            email=f"{customer_id}@example.com",
-            phone="+1-555-0123",
-            preferred_channel=NotificationChannel.EMAIL,
-            preferred_language="en",
-            notification_preferences={
-                "alerts": True,
-                "reminders": True,
-                "promotions": True,
-                "surveys": True
-            },
-            vehicle_ids=[customer_id.replace("CUST", "VH")]
-        )
+    async def _flush_profiles(self):
+        """Background task: fetch every pending profile in one bulk call"""
+        await asyncio.sleep(self.profile_batch_wait)
+        pending, self._pending_profiles = self._pending_profiles, {}
+        
+        try:
+            profiles = await self._get_customer_profiles(list(pending))
+        except Exception as e:
+            for future in pending.values():
+                if not future.done():
+                    future.set_exception(e)
+        else:
+            for customer_id, future in pending.items():
+                if not future.done():
+                    future.set_result(profiles.get(customer_id))
+    
+    async def _get_customer_profiles(self, customer_ids: List[str]) -> Dict[str, CustomerProfile]:
+        """Get several customer profiles from the backend in one call, caching them"""
+        # In production, this would be one POST /customers/bulk with the ids
+        # For demo, return mock profiles
+        profiles = {
+            customer_id: CustomerProfile(
+                customer_id=customer_id,
+                name="John Doe",
+                email=f"{customer_id}@example.com",
+                phone="+1-555-0123",
+                preferred_channel=NotificationChannel.EMAIL,
+                preferred_language="en",
+                notification_preferences={
+                    "alerts": True,
+                    "reminders": True,
+                    "promotions": True,
+                    "surveys": True
+                },
+                vehicle_ids=[customer_id.replace("CUST", "VH")]
+            )
+            for customer_id in customer_ids
+        }
+        
+        expires_at = time.monotonic() + self.profile_cache_ttl_seconds
+        for customer_id, profile in profiles.items():
+            self._profile_cache[customer_id] = (expires_at, profile)
+            self._profile_cache.move_to_end(customer_id)
+        while len(self._profile_cache) > self.profile_cache_size:
+            self._profile_cache.popitem(last=False)
+        
+        return profiles
     
     def _check_notification_preferences(self, customer: CustomerProfile, notification_type: str) -> bool:
         """Check if customer has enabled this notification type"""
-        type_map = {
-            "alert": "alerts",
-            "reminder": "reminders",
-            "promotion": "promotions",
-            "survey": "surveys",
-            "confirmation": "alerts",
-            "update": "alerts"
-        }
-        pref_key = type_map.get(notification_type, "alerts")
+        pref_key = _TYPE_TO_PREF.get(notification_type, "alerts")
         return customer.notification_preferences.get(pref_key, True)
     
     def _check_rate_limit(self, customer_id: str, channels: List[str]) -> bool:
         """Check if rate limit is exceeded"""
-        history = self._notification_history.get(customer_id, [])
-        one_hour_ago = datetime.utcnow() - timedelta(hours=1)
-        
-        recent = [n for n in history if datetime.fromisoformat(n.timestamp) > one_hour_ago]
+        cutoff = time.monotonic() - 3600
         
         for channel_str in channels:
-            channel = NotificationChannel(channel_str)
-            channel_count = sum(1 for n in recent if n.channel == channel)
-            if channel_count >= self.rate_limits.get(channel, 10):
+            window = self._rate_windows.get((customer_id, _CHANNELS[channel_str]))
+            if not window:
+                continue
+            
+            while window and window[0] <= cutoff:
+                window.popleft()
+            if len(window) >= window.maxlen:
                 return False
         
         return True
     
+    def _is_duplicate(self, key: Tuple[str, str, str, str]) -> bool:
+        """Check for an identical alert delivered within the dedup window"""
+        last_sent = self._recent_sends.get(key)
+        return last_sent is not None and time.monotonic() - last_sent < self.dedup_window_seconds
+    
+    def _record_send(self, key: Tuple[str, str, str, str]) -> None:
+        """Record a delivered alert so repeats within the window are suppressed"""
+        now = time.monotonic()
+        self._recent_sends[key] = now
+        self._recent_sends.move_to_end(key)
+        
+        # Expire old sends (oldest first) and cap the size
+        while self._recent_sends:
+            oldest_key, oldest_time = next(iter(self._recent_sends.items()))
+            expired = now - oldest_time >= self.dedup_window_seconds
+            if not expired and len(self._recent_sends) <= self.dedup_max_entries:
+                break
+            del self._recent_sends[oldest_key]
+    
     def _generate_content(self, template_name: str, channel: NotificationChannel, data: Dict) -> Dict:
         """Generate notification content from template"""
-        template = self.templates.get(template_name, self.templates["maintenance_reminder"])
+        is_sms = channel is NotificationChannel.SMS
+        compiled = _COMPILED_TEMPLATES.get((template_name, is_sms))
+        if compiled is None:
+            compiled = _COMPILED_TEMPLATES[("maintenance_reminder", is_sms)]
+        
+        subject, body = compiled
+        return {"subject": _render_template(subject, data), "body": _render_template(body, data)}
+    
+    async def _deliver_notification(self, notification: Notification) -> Dict:
+        """Deliver notification through its channel's batch and wait for the result"""
+        channel = notification.channel
+        loop = asyncio.get_running_loop()
         
-        if channel == NotificationChannel.SMS:
-            body = template.get("sms", template.get("body", ""))
+        entry = self._delivery_channels.get(channel)
+        if entry is None or entry[1].done() or entry[1].get_loop() is not loop:
+            queue = asyncio.Queue()
+            worker = loop.create_task(self._drain_deliveries(channel, queue))
+            self._delivery_channels[channel] = (queue, worker)
         else:
-            body = template.get("body", "")
+            queue = entry[0]
         
-        subject = template.get("subject", "AutoSentry Notification")
+        result = loop.create_future()
+        queue.put_nowait((notification, result))
+        return await result
+    
+    async def _drain_deliveries(self, channel: NotificationChannel, queue: asyncio.Queue):
+        """Background task: deliver a channel's queued notifications in batches"""
+        batch = []
+        try:
+            while True:
+                batch = [await queue.get()]
+                
+                # Give concurrent sends a moment to add to the batch
+                await asyncio.sleep(self.delivery_flush_interval)
+                while len(batch) < self.delivery_batch_size and not queue.empty():
+                    batch.append(queue.get_nowait())
+                
+                try:
+                    send_results = await self._deliver_batch(channel, [n for n, _ in batch])
+                except Exception as e:
+                    for _, result in batch:
+                        if not result.done():
+                            result.set_exception(e)
+                else:
+                    for (_, result), send_result in zip(batch, send_results):
+                        if not result.done():
+                            result.set_result(send_result)
+        except asyncio.CancelledError:
+            # Don't leave senders waiting on a worker that's gone
+            _fail_deliveries(
+                queue, batch, RuntimeError(f"{channel.value} delivery stopped before sending")
+            )
+            raise
+    
+    async def _deliver_batch(
+        self, channel: NotificationChannel, notifications: List[Notification]
+    ) -> List[Dict]:
+        """Deliver notifications for one channel in a single bulk request"""
+        await self._post_batch(
+            channel, _encode_json({"channel": channel.value, "notifications": notifications})
+        )
         
-        # Replace placeholders
-        for key, value in data.items():
-            placeholder = "{" + key + "}"
-            subject = subject.replace(placeholder, str(value))
-            body = body.replace(placeholder, str(value))
+        timestamp = datetime.utcnow().isoformat()
+        send_results = []
+        for notification in notifications:
+            notification.delivered = True
+            send_results.append({
+                "delivered": True,
+                "message_id": f"MSG-{notification.notification_id}",
+                "channel": channel.value,
+                "timestamp": timestamp
+            })
         
-        return {"subject": subject, "body": body}
+        return send_results
     
-    async def _deliver_notification(self, notification: Notification) -> Dict:
-        """Deliver notification through appropriate channel"""
-        # In production, this would call actual notification services
-        # (SendGrid for email, Twilio for SMS, Firebase for push, etc.)
+    async def _post_batch(self, channel: NotificationChannel, body: bytes) -> None:
+        """Send an encoded batch to the channel's bulk delivery API"""
+        # In production, this would POST body through self.http_client
+        # (content=body, headers=_JSON_HEADERS) to the channel's provider
+        # (SendGrid personalizations, Twilio messaging service, FCM multicast, etc.)
         
         # Simulate delivery
         await asyncio.sleep(0.1)
-        
-        notification.delivered = True
-        
-        return {
-            "delivered": True,
-            "message_id": f"MSG-{notification.notification_id}",
-            "channel": notification.channel.value,
-            "timestamp": datetime.utcnow().isoformat()
-        }
     
     def _track_notification(self, customer_id: str, notification: Notification) -> None:
         """Track notification for history and analytics"""
-        if customer_id not in self._notification_history:
-            self._notification_history[customer_id] = []
+        history = self._notification_history.get(customer_id)
+        if history is None:
+            history = self._notification_history[customer_id] = NotificationLog()
+        history.append(notification)
         
-        self._notification_history[customer_id].append(notification)
-        
-        # Keep last 100 notifications per customer
-        if len(self._notification_history[customer_id]) > 100:
-            self._notification_history[customer_id] = self._notification_history[customer_id][-100:]
+        key = (customer_id, notification.channel)
+        window = self._rate_windows.get(key)
+        if window is None:
+            window = self._rate_windows[key] = deque(
+                maxlen=self.rate_limits.get(notification.channel, 10)
+            )
+        window.append(time.monotonic())
     
     async def _schedule_follow_up(self, customer_id: str, vehicle_id: str, hours: int) -> Dict:
         """Schedule a follow-up notification"""
@@ -693,7 +1052,7 @@ AutoSentry AI Team""",
         """Monitor customer engagement metrics"""
         customer_id = payload.get("customer_id")
         
-        history = self._notification_history.get(customer_id, [])
+        history = self._notification_history.get(customer_id)
         
         if not history:
             return {
@@ -702,19 +1061,29 @@ AutoSentry AI Team""",
                 "engagement_rate": 0
             }
         
+        # One pass: channel -> [total, delivered, read]
+        counts: Dict[NotificationChannel, List[int]] = {}
+        for channel, was_delivered, was_read in zip(history.channels, history.delivered, history.read):
+            channel_counts = counts.get(channel)
+            if channel_counts is None:
+                channel_counts = counts[channel] = [0, 0, 0]
+            channel_counts[0] += 1
+            channel_counts[1] += was_delivered
+            channel_counts[2] += was_read
+        
         total = len(history)
-        delivered = sum(1 for n in history if n.delivered)
-        read = sum(1 for n in history if n.read)
-        
-        by_channel = {}
-        for channel in NotificationChannel:
-            channel_notifs = [n for n in history if n.channel == channel]
-            if channel_notifs:
-                by_channel[channel.value] = {
-                    "total": len(channel_notifs),
-                    "delivered": sum(1 for n in channel_notifs if n.delivered),
-                    "read": sum(1 for n in channel_notifs if n.read)
-                }
+        delivered = sum(c[1] for c in counts.values())
+        read = sum(c[2] for c in counts.values())
+        
+        by_channel = {
+            channel.value: {
+                "total": counts[channel][0],
+                "delivered": counts[channel][1],
+                "read": counts[channel][2]
+            }
+            for channel in _CHANNELS.values()
+            if channel in counts
+        }
         
         return {
             "customer_id": customer_id,
@@ -724,7 +1093,7 @@ AutoSentry AI Team""",
             "read": read,
             "engagement_rate": read / delivered if delivered > 0 else 0,
             "by_channel": by_channel,
-            "last_notification": history[-1].timestamp if history else None
+            "last_notification": history.timestamps[-1]
         }
     
     async def send_appointment_confirmation(
@@ -832,5 +1201,7 @@ if __name__ == "__main__":
         
         result = await agent.execute(task)
         print(json.dumps(result.result, indent=2))
+        
+        await agent.shutdown()
     
     asyncio.run(test())
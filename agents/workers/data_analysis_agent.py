@@ -6,9 +6,13 @@ Analyzes vehicle telemetry data and identifies patterns
 import os
 import json
 import asyncio
+import functools
+import time
+from collections import Counter, OrderedDict
 from datetime import datetime, timedelta
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, FrozenSet, List, Optional, Tuple
 from dataclasses import dataclass, field
+from types import MappingProxyType
 import httpx
 
 # Import shared types
@@ -16,6 +20,132 @@ import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from adapters import AgentType, ActionType, AgentTask, AgentResult
 
+# Optional NumPy fast path for trend analysis
+NUMPY_AVAILABLE = False
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    pass
+
+# Optional fast JSON encoding
+ORJSON_AVAILABLE = False
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    pass
+
+# HTTP/2 needs the optional h2 package (httpx[http2])
+HTTP2_AVAILABLE = False
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    pass
+
+# Metrics tracked for trends, in trend-buffer column order
+_TREND_METRICS = ("engine_temp", "battery_voltage", "oil_pressure", "fuel_efficiency")
+
+# Readings kept per vehicle, and how many of the latest feed a trend
+_HISTORY_SIZE = 100
+_TREND_WINDOW = 10
+
+# Below this many readings NumPy's fixed overhead outweighs the savings
+_NUMPY_BATCH_THRESHOLD = 64
+
+# Threshold checks run on every reading: (metric, default, +1 if high
+# values are bad or -1 if low ones are, threshold keys for critical then
+# warning, anomaly types, message formats)
+_ANOMALY_CHECKS = (
+    ("engine_temp", 90, 1, "critical", "warning",
+     "engine_overheating", "engine_temp_warning",
+     "Critical: Engine temperature at {}°C", "Warning: Engine temperature elevated at {}°C"),
+    ("battery_voltage", 12.6, -1, "critical_low", "warning_low",
+     "battery_critical_low", "battery_low",
+     "Critical: Battery voltage at {}V", "Warning: Low battery voltage at {}V"),
+    ("oil_pressure", 40, -1, "critical_low", "warning_low",
+     "oil_pressure_critical", "oil_pressure_low",
+     "Critical: Oil pressure at {} PSI", "Warning: Oil pressure low at {} PSI"),
+    ("brake_pad_thickness", 10, -1, "critical", "warning",
+     "brake_critical", "brake_warning",
+     "Critical: Brake pads at {}mm - immediate replacement required",
+     "Warning: Brake pads at {}mm - schedule replacement"),
+    ("coolant_level", 80, -1, "critical", "warning",
+     "coolant_critical", "coolant_low",
+     "Critical: Coolant level at {}%", "Warning: Coolant level low at {}%"),
+)
+
+# Diagnosis priority before anomaly boosts, per risk level
+_RISK_BASE_PRIORITY = MappingProxyType({
+    "critical": 10,
+    "high": 7,
+    "medium": 4,
+    "low": 1
+})
+
+# Risk levels that need a diagnosis even without anomalies
+_DIAGNOSIS_RISK_LEVELS = frozenset({"high", "critical"})
+
+# Recommendation per system, in output order, for anomaly types naming it
+_ANOMALY_RECOMMENDATIONS = (
+    ("engine", "Schedule engine diagnostic check immediately"),
+    ("battery", "Have battery and charging system tested"),
+    ("brake", "Brake system inspection required - safety critical"),
+    ("oil", "Check oil level and schedule oil change if needed"),
+    ("coolant", "Top up coolant and check for leaks"),
+)
+
+# Trend metrics worth flagging when they fall / rise
+_DECLINE_WATCH_METRICS = frozenset({"battery_voltage", "oil_pressure"})
+_RISE_WATCH_METRICS = frozenset({"engine_temp"})
+
+# Component health readings averaged into the health score
+_COMPONENT_HEALTH_METRICS = (
+    "engine_health", "transmission_health", "battery_health", "brake_health", "suspension_health"
+)
+
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+@functools.lru_cache(maxsize=1)
+def _utc_iso(timestamp_ns: int) -> str:
+    """A time.time_ns() value as the naive UTC ISO string utcnow().isoformat() gives"""
+    return (_EPOCH + timedelta(microseconds=timestamp_ns // 1000)).isoformat()
+
+
+@functools.lru_cache(maxsize=256)
+def _recommendation_slots(anomaly_type: str) -> FrozenSet[int]:
+    """Positions in _ANOMALY_RECOMMENDATIONS whose system an anomaly type names"""
+    return frozenset(
+        i for i, (system, _) in enumerate(_ANOMALY_RECOMMENDATIONS) if system in anomaly_type
+    )
+
+
+def _format_json(payload: Any) -> str:
+    """Indented JSON text for a result, via orjson when available"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(payload, option=orjson.OPT_INDENT_2, default=str).decode()
+    return json.dumps(payload, indent=2, default=str, ensure_ascii=False)
+
+
+def _copy_findings(findings: List[Dict]) -> List[Dict]:
+    """Copies of pattern/anomaly dicts (and their nested metrics) to hand out"""
+    return [
+        {key: dict(value) if isinstance(value, dict) else value for key, value in finding.items()}
+        for finding in findings
+    ]
+
+
+def _telemetry_key(telemetry: Dict) -> Optional[FrozenSet]:
+    """Hashable identity of a reading's content, or None if it has unhashable values"""
+    try:
+        # Typed, so 20 and 20.0 (rendered differently in messages) stay apart
+        return frozenset(zip(telemetry.items(), map(type, telemetry.values())))
+    except TypeError:
+        return None
+
 
 @dataclass
 class TelemetryAnalysis:
@@ -41,6 +171,60 @@ class HistoricalComparison:
     is_anomaly: bool
 
 
+class VehicleHistory:
+    """
+    A vehicle's most recent readings, stored as one column per trend metric.
+    
+    Columns are ring buffers indexed by count % _HISTORY_SIZE, so each
+    metric's history is contiguous: rows of a NumPy array (NaN where a
+    reading lacked the metric) when NumPy is installed, else lists (None).
+    Only the latest full reading is kept, for re-analysis.
+    """
+    
+    __slots__ = ("columns", "timestamps", "count", "latest")
+    
+    def __init__(self):
+        if NUMPY_AVAILABLE:
+            self.columns = np.full((len(_TREND_METRICS), _HISTORY_SIZE), np.nan)
+        else:
+            self.columns = [[None] * _HISTORY_SIZE for _ in _TREND_METRICS]
+        # time.time_ns() per reading; formatted only when reported
+        self.timestamps: List[Optional[int]] = [None] * _HISTORY_SIZE
+        self.count = 0
+        self.latest: Dict = {}
+    
+    def append(self, telemetry: Dict, timestamp_ns: int) -> None:
+        """Record a reading, overwriting the oldest once full"""
+        slot = self.count % _HISTORY_SIZE
+        if NUMPY_AVAILABLE:
+            self.columns[:, slot] = [telemetry.get(m, np.nan) for m in _TREND_METRICS]
+        else:
+            for column, metric in zip(self.columns, _TREND_METRICS):
+                column[slot] = telemetry.get(metric)
+        self.timestamps[slot] = timestamp_ns
+        # A copy, so later edits to the caller's dict don't rewrite history
+        self.latest = dict(telemetry)
+        self.count += 1
+    
+    def recent_slots(self, n: int) -> List[int]:
+        """Ring positions of the latest n readings (or fewer), oldest first"""
+        n = min(n, len(self))
+        return [(self.count - n + i) % _HISTORY_SIZE for i in range(n)]
+    
+    def first_timestamp(self) -> Optional[str]:
+        if not self.count:
+            return None
+        return _utc_iso(self.timestamps[(self.count - len(self)) % _HISTORY_SIZE])
+    
+    def last_timestamp(self) -> Optional[str]:
+        if not self.count:
+            return None
+        return _utc_iso(self.timestamps[(self.count - 1) % _HISTORY_SIZE])
+    
+    def __len__(self) -> int:
+        return min(self.count, _HISTORY_SIZE)
+
+
 class DataAnalysisAgent:
     """
     Data Analysis Agent - Worker Agent #1
@@ -58,6 +242,15 @@ class DataAnalysisAgent:
         self.ml_service_url = os.getenv("ML_SERVICE_URL", "http://localhost:8001")
         self.ueba_service_url = os.getenv("UEBA_SERVICE_URL", "http://localhost:8002")
         
+        # One pooled client for all ML service calls, so telemetry fetches
+        # reuse keep-alive (and HTTP/2, with h2 installed) connections
+        self.http_client = httpx.AsyncClient(
+            base_url=self.ml_service_url,
+            timeout=httpx.Timeout(10.0),
+            http2=HTTP2_AVAILABLE,
+            limits=httpx.Limits(max_keepalive_connections=32)
+        )
+        
         # Analysis thresholds
         self.thresholds = {
             "engine_temp": {"warning": 100, "critical": 110},
@@ -69,19 +262,64 @@ class DataAnalysisAgent:
             "fuel_efficiency_drop": {"warning": 15, "critical": 25},  # percentage
         }
         
-        # Historical data cache
-        self._historical_cache: Dict[str, List[Dict]] = {}
+        # _ANOMALY_CHECKS with thresholds resolved, pre-multiplied by the
+        # check's sign so every check is "signed value >= signed limit"
+        rules = []
+        for metric, default, sign, critical_key, warning_key, *names in _ANOMALY_CHECKS:
+            critical = self.thresholds[metric][critical_key]
+            warning = self.thresholds[metric][warning_key]
+            rules.append((metric, default, sign, critical, sign * critical, warning, sign * warning, *names))
+        self._anomaly_rules = tuple(rules)
+        
+        # The same rules as aligned arrays, for checking many readings at once
+        if NUMPY_AVAILABLE:
+            self._anomaly_signs = np.array([rule[2] for rule in rules], dtype=np.float64)
+            self._anomaly_limits = np.minimum(
+                np.array([rule[4] for rule in rules], dtype=np.float64),
+                np.array([rule[6] for rule in rules], dtype=np.float64)
+            )
+        
+        # Reading-level results (patterns, anomalies, severity counts, health
+        # score, risk level) by telemetry content, least recently used first.
+        # Trends depend on history, so they are never cached
+        self._assessment_cache: "OrderedDict[FrozenSet, Tuple]" = OrderedDict()
+        self.assessment_cache_size = 512
         
+        # Historical data cache: per-vehicle columnar reading history
+        self._historical_cache: Dict[str, VehicleHistory] = {}
+        
+    async def __aenter__(self) -> "DataAnalysisAgent":
+        return self
+    
+    async def __aexit__(self, *exc_info) -> None:
+        await self.shutdown()
+    
+    async def shutdown(self):
+        """Close the shared HTTP client"""
+        await self.http_client.aclose()
+    
     async def execute(self, task: AgentTask) -> AgentResult:
         """Execute data analysis task"""
-        start_time = datetime.utcnow()
+        start_time = time.perf_counter()
+        # One wall-clock stamp for everything this task records
+        timestamp_ns = time.time_ns()
         
         try:
             action = task.action
             payload = task.payload
             
-            if action == ActionType.ANALYZE:
-                result = await self._analyze_telemetry(payload)
+            if action == ActionType.ANALYZE and "telemetry_batch" in payload:
+                # Backfill / replay: many readings for one vehicle, oldest first
+                analyses = await self._analyze_telemetry_batch(
+                    payload.get("vehicle_id"), payload["telemetry_batch"], timestamp_ns
+                )
+                result = {
+                    "vehicle_id": payload.get("vehicle_id"),
+                    "readings_analyzed": len(analyses),
+                    "analyses": analyses
+                }
+            elif action == ActionType.ANALYZE:
+                result = await self._analyze_telemetry(payload, timestamp_ns)
             elif action == ActionType.MONITOR:
                 result = await self._continuous_monitoring(payload)
             else:
@@ -92,7 +330,7 @@ class DataAnalysisAgent:
                 agent_type=self.agent_type,
                 success=True,
                 result=result,
-                execution_time=(datetime.utcnow() - start_time).total_seconds()
+                execution_time=time.perf_counter() - start_time
             )
             
         except Exception as e:
@@ -102,10 +340,12 @@ class DataAnalysisAgent:
                 success=False,
                 result={"error": str(e)},
                 error=str(e),
-                execution_time=(datetime.utcnow() - start_time).total_seconds()
+                execution_time=time.perf_counter() - start_time
             )
     
-    async def _analyze_telemetry(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+    async def _analyze_telemetry(
+        self, payload: Dict[str, Any], timestamp_ns: Optional[int] = None
+    ) -> Dict[str, Any]:
         """Analyze vehicle telemetry data"""
         vehicle_id = payload.get("vehicle_id")
         telemetry = payload.get("telemetry", {})
@@ -113,41 +353,107 @@ class DataAnalysisAgent:
         if not vehicle_id or not telemetry:
             return {"error": "Missing vehicle_id or telemetry data"}
         
-        # Perform multi-dimensional analysis
-        patterns = await self._detect_patterns(vehicle_id, telemetry)
-        anomalies = await self._detect_anomalies(telemetry)
+        return await self._analyze_reading(vehicle_id, telemetry, timestamp_ns=timestamp_ns)
+    
+    async def _analyze_telemetry_batch(
+        self,
+        vehicle_id: str,
+        telemetry_batch: List[Dict],
+        timestamp_ns: Optional[int] = None,
+        timestamps_ns: Optional[List[int]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Analyze many readings for one vehicle, oldest first.
+        
+        Gives the same results as calling _analyze_telemetry on each reading
+        in turn, but threshold checks for the whole batch run at once.
+        Empty readings are skipped. timestamps_ns, when given, holds each
+        reading's own time.time_ns() stamp; otherwise all share timestamp_ns.
+        """
+        if not vehicle_id:
+            return [{"error": "Missing vehicle_id or telemetry data"}]
+        
+        if timestamps_ns is None:
+            if timestamp_ns is None:
+                timestamp_ns = time.time_ns()
+            timestamps_ns = [timestamp_ns] * len(telemetry_batch)
+        
+        stamped = [
+            (telemetry, stamp)
+            for telemetry, stamp in zip(telemetry_batch, timestamps_ns)
+            if telemetry
+        ]
+        anomalies_per_reading = await self._detect_anomalies_batch(
+            [telemetry for telemetry, _ in stamped]
+        )
+        
+        # Trends depend on the readings before each one, so the rest of the
+        # analysis stays sequential
+        return [
+            await self._analyze_reading(vehicle_id, telemetry, anomalies, stamp)
+            for (telemetry, stamp), anomalies in zip(stamped, anomalies_per_reading)
+        ]
+    
+    async def _analyze_reading(
+        self,
+        vehicle_id: str,
+        telemetry: Dict,
+        anomalies: Optional[List[Dict]] = None,
+        timestamp_ns: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """Analyze one reading, given its anomalies if they're already known"""
+        if timestamp_ns is None:
+            timestamp_ns = time.time_ns()
+        
+        key = _telemetry_key(telemetry)
+        assessment = self._assessment_cache.get(key) if key is not None else None
+        if assessment is None:
+            assessment = await self._assess_reading(vehicle_id, telemetry, anomalies)
+            if key is not None:
+                self._assessment_cache[key] = assessment
+                if len(self._assessment_cache) > self.assessment_cache_size:
+                    self._assessment_cache.popitem(last=False)
+        else:
+            self._assessment_cache.move_to_end(key)
+        
+        # Callers get their own copies, so editing a result can't alter the cache
+        patterns, anomalies, severity_counts, health_score, risk_level = assessment
+        patterns = _copy_findings(patterns)
+        anomalies = _copy_findings(anomalies)
         trends = await self._analyze_trends(vehicle_id, telemetry)
-        health_score = self._calculate_health_score(telemetry, anomalies)
-        risk_level = self._determine_risk_level(health_score, anomalies)
         recommendations = self._generate_recommendations(anomalies, trends, health_score)
         
         # Store in historical cache for trend analysis
-        self._update_historical_cache(vehicle_id, telemetry)
-        
-        analysis = TelemetryAnalysis(
-            vehicle_id=vehicle_id,
-            timestamp=datetime.utcnow().isoformat(),
-            patterns_detected=patterns,
-            anomalies=anomalies,
-            trends=trends,
-            health_score=health_score,
-            risk_level=risk_level,
-            recommendations=recommendations
-        )
+        self._update_historical_cache(vehicle_id, telemetry, timestamp_ns)
         
+        # Same fields as TelemetryAnalysis, built straight into the response
         return {
-            "vehicle_id": analysis.vehicle_id,
-            "timestamp": analysis.timestamp,
-            "health_score": analysis.health_score,
-            "risk_level": analysis.risk_level,
-            "patterns_detected": analysis.patterns_detected,
-            "anomalies": analysis.anomalies,
-            "trends": analysis.trends,
-            "recommendations": analysis.recommendations,
-            "requires_diagnosis": len(anomalies) > 0 or risk_level in ["high", "critical"],
-            "diagnosis_priority": self._calculate_diagnosis_priority(risk_level, anomalies)
+            "vehicle_id": vehicle_id,
+            "timestamp": _utc_iso(timestamp_ns),
+            "health_score": health_score,
+            "risk_level": risk_level,
+            "patterns_detected": patterns,
+            "anomalies": anomalies,
+            "trends": trends,
+            "recommendations": recommendations,
+            "requires_diagnosis": len(anomalies) > 0 or risk_level in _DIAGNOSIS_RISK_LEVELS,
+            "diagnosis_priority": self._calculate_diagnosis_priority(risk_level, severity_counts)
         }
     
+    async def _assess_reading(
+        self, vehicle_id: str, telemetry: Dict, anomalies: Optional[List[Dict]]
+    ) -> Tuple[List[Dict], List[Dict], "Counter[str]", float, str]:
+        """The parts of an analysis that depend only on the reading itself"""
+        # Perform multi-dimensional analysis
+        patterns = await self._detect_patterns(vehicle_id, telemetry)
+        if anomalies is None:
+            anomalies = await self._detect_anomalies(telemetry)
+        # Anomalies per severity, shared by the scoring steps below
+        severity_counts = Counter(a["severity"] for a in anomalies)
+        health_score = self._calculate_health_score(telemetry, severity_counts)
+        risk_level = self._determine_risk_level(health_score, severity_counts)
+        return patterns, anomalies, severity_counts, health_score, risk_level
+    
     async def _detect_patterns(self, vehicle_id: str, telemetry: Dict) -> List[Dict]:
         """Detect patterns in telemetry data"""
         patterns = []
@@ -226,118 +532,73 @@ class DataAnalysisAgent:
         """Detect anomalies based on threshold violations"""
         anomalies = []
         
-        # Engine temperature check
-        engine_temp = telemetry.get("engine_temp", 90)
-        if engine_temp >= self.thresholds["engine_temp"]["critical"]:
-            anomalies.append({
-                "type": "engine_overheating",
-                "severity": "critical",
-                "value": engine_temp,
-                "threshold": self.thresholds["engine_temp"]["critical"],
-                "message": f"Critical: Engine temperature at {engine_temp}°C"
-            })
-        elif engine_temp >= self.thresholds["engine_temp"]["warning"]:
-            anomalies.append({
-                "type": "engine_temp_warning",
-                "severity": "warning",
-                "value": engine_temp,
-                "threshold": self.thresholds["engine_temp"]["warning"],
-                "message": f"Warning: Engine temperature elevated at {engine_temp}°C"
-            })
-        
-        # Battery voltage check
-        battery = telemetry.get("battery_voltage", 12.6)
-        if battery <= self.thresholds["battery_voltage"]["critical_low"]:
-            anomalies.append({
-                "type": "battery_critical_low",
-                "severity": "critical",
-                "value": battery,
-                "threshold": self.thresholds["battery_voltage"]["critical_low"],
-                "message": f"Critical: Battery voltage at {battery}V"
-            })
-        elif battery <= self.thresholds["battery_voltage"]["warning_low"]:
-            anomalies.append({
-                "type": "battery_low",
-                "severity": "warning",
-                "value": battery,
-                "threshold": self.thresholds["battery_voltage"]["warning_low"],
-                "message": f"Warning: Low battery voltage at {battery}V"
-            })
-        
-        # Oil pressure check
-        oil_pressure = telemetry.get("oil_pressure", 40)
-        if oil_pressure <= self.thresholds["oil_pressure"]["critical_low"]:
-            anomalies.append({
-                "type": "oil_pressure_critical",
-                "severity": "critical",
-                "value": oil_pressure,
-                "threshold": self.thresholds["oil_pressure"]["critical_low"],
-                "message": f"Critical: Oil pressure at {oil_pressure} PSI"
-            })
-        elif oil_pressure <= self.thresholds["oil_pressure"]["warning_low"]:
-            anomalies.append({
-                "type": "oil_pressure_low",
-                "severity": "warning",
-                "value": oil_pressure,
-                "threshold": self.thresholds["oil_pressure"]["warning_low"],
-                "message": f"Warning: Oil pressure low at {oil_pressure} PSI"
-            })
-        
-        # Brake pad thickness check
-        brake_pad = telemetry.get("brake_pad_thickness", 10)
-        if brake_pad <= self.thresholds["brake_pad_thickness"]["critical"]:
-            anomalies.append({
-                "type": "brake_critical",
-                "severity": "critical",
-                "value": brake_pad,
-                "threshold": self.thresholds["brake_pad_thickness"]["critical"],
-                "message": f"Critical: Brake pads at {brake_pad}mm - immediate replacement required"
-            })
-        elif brake_pad <= self.thresholds["brake_pad_thickness"]["warning"]:
-            anomalies.append({
-                "type": "brake_warning",
-                "severity": "warning",
-                "value": brake_pad,
-                "threshold": self.thresholds["brake_pad_thickness"]["warning"],
-                "message": f"Warning: Brake pads at {brake_pad}mm - schedule replacement"
-            })
+        for (metric, default, sign, critical, critical_limit, warning, warning_limit,
+             critical_type, warning_type, critical_message, warning_message) in self._anomaly_rules:
+            value = telemetry.get(metric, default)
+            signed = sign * value
+            if signed >= critical_limit:
+                anomalies.append({
+                    "type": critical_type,
+                    "severity": "critical",
+                    "value": value,
+                    "threshold": critical,
+                    "message": critical_message.format(value)
+                })
+            elif signed >= warning_limit:
+                anomalies.append({
+                    "type": warning_type,
+                    "severity": "warning",
+                    "value": value,
+                    "threshold": warning,
+                    "message": warning_message.format(value)
+                })
         
-        # Coolant level check
-        coolant = telemetry.get("coolant_level", 80)
-        if coolant <= self.thresholds["coolant_level"]["critical"]:
-            anomalies.append({
-                "type": "coolant_critical",
-                "severity": "critical",
-                "value": coolant,
-                "threshold": self.thresholds["coolant_level"]["critical"],
-                "message": f"Critical: Coolant level at {coolant}%"
-            })
-        elif coolant <= self.thresholds["coolant_level"]["warning"]:
-            anomalies.append({
-                "type": "coolant_low",
-                "severity": "warning",
-                "value": coolant,
-                "threshold": self.thresholds["coolant_level"]["warning"],
-                "message": f"Warning: Coolant level low at {coolant}%"
-            })
+        return anomalies
+    
+    async def _detect_anomalies_batch(self, telemetry_list: List[Dict]) -> List[List[Dict]]:
+        """
+        Run _detect_anomalies over many readings.
+        
+        Large batches are screened with one vectorized comparison against
+        the precomputed limits; only readings that breach a limit go through
+        the rule loop to build their anomaly dicts.
+        """
+        if not NUMPY_AVAILABLE or len(telemetry_list) < _NUMPY_BATCH_THRESHOLD:
+            return [await self._detect_anomalies(telemetry) for telemetry in telemetry_list]
+        
+        count = len(telemetry_list)
+        values = np.empty((count, len(self._anomaly_rules)))
+        for column, rule in enumerate(self._anomaly_rules):
+            metric, default = rule[0], rule[1]
+            values[:, column] = np.fromiter(
+                (telemetry.get(metric, default) for telemetry in telemetry_list),
+                dtype=np.float64, count=count
+            )
+        breached = (values * self._anomaly_signs >= self._anomaly_limits).any(axis=1)
         
+        anomalies = [[] for _ in range(count)]
+        for i in np.flatnonzero(breached).tolist():
+            anomalies[i] = await self._detect_anomalies(telemetry_list[i])
         return anomalies
     
     async def _analyze_trends(self, vehicle_id: str, telemetry: Dict) -> Dict[str, Any]:
         """Analyze trends based on historical data"""
         trends = {}
         
-        historical = self._historical_cache.get(vehicle_id, [])
-        if len(historical) < 2:
+        history = self._historical_cache.get(vehicle_id)
+        if history is None or len(history) < 2:
             return {"message": "Insufficient historical data for trend analysis"}
         
-        # Calculate trends for key metrics
-        metrics = ["engine_temp", "battery_voltage", "oil_pressure", "fuel_efficiency"]
+        slots = history.recent_slots(_TREND_WINDOW)
+        if NUMPY_AVAILABLE:
+            return self._trends_from_columns(history, slots, telemetry)
         
-        for metric in metrics:
+        # Calculate trends for key metrics
+        for metric, column in zip(_TREND_METRICS, history.columns):
             if metric in telemetry:
                 current = telemetry[metric]
-                historical_values = [h.get(metric, current) for h in historical[-10:]]
+                # A reading that lacked the metric counts as the current value
+                historical_values = [current if column[i] is None else column[i] for i in slots]
                 
                 if historical_values:
                     avg = sum(historical_values) / len(historical_values)
@@ -365,37 +626,75 @@ class DataAnalysisAgent:
         
         return trends
     
-    def _calculate_health_score(self, telemetry: Dict, anomalies: List[Dict]) -> float:
-        """Calculate overall vehicle health score (0-100)"""
-        score = 100.0
+    @staticmethod
+    def _trends_from_columns(
+        history: VehicleHistory, slots: List[int], telemetry: Dict
+    ) -> Dict[str, Any]:
+        """_analyze_trends over NumPy history columns, all metrics at once"""
+        rows = len(slots)
+        
+        # Latest readings x metrics, oldest first; a reading that lacked a
+        # metric counts as the current value, as in the scalar path. Summing
+        # down this C-ordered copy adds reading by reading, like sum() does
+        current = np.array([telemetry.get(m, np.nan) for m in _TREND_METRICS], dtype=np.float64)
+        window = history.columns.T[slots]
+        window = np.where(np.isnan(window), current, window)
+        
+        avg = window.sum(axis=0) / rows
+        deviation = np.divide(
+            current - avg, avg, out=np.zeros_like(avg), where=avg != 0
+        ) * 100
+        
+        if rows >= 3:
+            steps = np.diff(window[-3:], axis=0)
+            increasing = (steps > 0).all(axis=0)
+            decreasing = (steps < 0).all(axis=0)
+        
+        trends = {}
+        for i, metric in enumerate(_TREND_METRICS):
+            if metric not in telemetry:
+                continue
+            
+            if rows < 3:
+                trend = "insufficient_data"
+            elif increasing[i]:
+                trend = "increasing"
+            elif decreasing[i]:
+                trend = "decreasing"
+            else:
+                trend = "stable"
+            
+            trends[metric] = {
+                "current": telemetry[metric],
+                "historical_avg": round(float(avg[i]), 2),
+                "deviation_percent": round(float(deviation[i]), 2),
+                "trend": trend,
+                "is_concerning": bool(abs(deviation[i]) > 20)
+            }
         
+        return trends
+    
+    def _calculate_health_score(self, telemetry: Dict, severity_counts: "Counter[str]") -> float:
+        """Calculate overall vehicle health score (0-100)"""
         # Deduct for anomalies
-        for anomaly in anomalies:
-            if anomaly["severity"] == "critical":
-                score -= 25
-            elif anomaly["severity"] == "warning":
-                score -= 10
-            elif anomaly["severity"] == "info":
-                score -= 3
+        score = 100.0 - (
+            25 * severity_counts["critical"]
+            + 10 * severity_counts["warning"]
+            + 3 * severity_counts["info"]
+        )
         
         # Factor in component health percentages
-        component_health = [
-            telemetry.get("engine_health", 100),
-            telemetry.get("transmission_health", 100),
-            telemetry.get("battery_health", 100),
-            telemetry.get("brake_health", 100),
-            telemetry.get("suspension_health", 100)
-        ]
-        
-        avg_component_health = sum(component_health) / len(component_health)
+        avg_component_health = sum(
+            telemetry.get(metric, 100) for metric in _COMPONENT_HEALTH_METRICS
+        ) / len(_COMPONENT_HEALTH_METRICS)
         score = (score * 0.6) + (avg_component_health * 0.4)
         
         return max(0, min(100, round(score, 1)))
     
-    def _determine_risk_level(self, health_score: float, anomalies: List[Dict]) -> str:
+    def _determine_risk_level(self, health_score: float, severity_counts: "Counter[str]") -> str:
         """Determine overall risk level"""
-        critical_count = sum(1 for a in anomalies if a["severity"] == "critical")
-        warning_count = sum(1 for a in anomalies if a["severity"] == "warning")
+        critical_count = severity_counts["critical"]
+        warning_count = severity_counts["warning"]
         
         if critical_count >= 2 or health_score < 30:
             return "critical"
@@ -410,30 +709,20 @@ class DataAnalysisAgent:
         """Generate actionable recommendations"""
         recommendations = []
         
-        # Based on anomalies
-        anomaly_types = [a["type"] for a in anomalies]
-        
-        if any("engine" in t for t in anomaly_types):
-            recommendations.append("Schedule engine diagnostic check immediately")
-        
-        if any("battery" in t for t in anomaly_types):
-            recommendations.append("Have battery and charging system tested")
-        
-        if any("brake" in t for t in anomaly_types):
-            recommendations.append("Brake system inspection required - safety critical")
-        
-        if any("oil" in t for t in anomaly_types):
-            recommendations.append("Check oil level and schedule oil change if needed")
-        
-        if any("coolant" in t for t in anomaly_types):
-            recommendations.append("Top up coolant and check for leaks")
+        # Based on anomalies: one pass, each type's systems resolved once
+        hit = set()
+        for anomaly in anomalies:
+            hit |= _recommendation_slots(anomaly["type"])
+        recommendations.extend(
+            _ANOMALY_RECOMMENDATIONS[i][1] for i in sorted(hit)
+        )
         
         # Based on trends
         for metric, trend_data in trends.items():
             if isinstance(trend_data, dict) and trend_data.get("is_concerning"):
-                if trend_data.get("trend") == "decreasing" and metric in ["battery_voltage", "oil_pressure"]:
+                if trend_data.get("trend") == "decreasing" and metric in _DECLINE_WATCH_METRICS:
                     recommendations.append(f"Monitor {metric.replace('_', ' ')} - showing concerning decline")
-                elif trend_data.get("trend") == "increasing" and metric in ["engine_temp"]:
+                elif trend_data.get("trend") == "increasing" and metric in _RISE_WATCH_METRICS:
                     recommendations.append(f"Monitor {metric.replace('_', ' ')} - showing upward trend")
         
         # Based on overall health
@@ -444,34 +733,24 @@ class DataAnalysisAgent:
         
         return recommendations
     
-    def _calculate_diagnosis_priority(self, risk_level: str, anomalies: List[Dict]) -> int:
+    def _calculate_diagnosis_priority(self, risk_level: str, severity_counts: "Counter[str]") -> int:
         """Calculate priority for diagnosis agent (1-10, 10 highest)"""
-        base_priority = {
-            "critical": 10,
-            "high": 7,
-            "medium": 4,
-            "low": 1
-        }.get(risk_level, 1)
+        base_priority = _RISK_BASE_PRIORITY.get(risk_level, 1)
         
         # Boost for multiple anomalies
-        critical_boost = sum(2 for a in anomalies if a["severity"] == "critical")
-        warning_boost = sum(1 for a in anomalies if a["severity"] == "warning")
+        critical_boost = 2 * severity_counts["critical"]
+        warning_boost = severity_counts["warning"]
         
         return min(10, base_priority + critical_boost + (warning_boost // 2))
     
-    def _update_historical_cache(self, vehicle_id: str, telemetry: Dict) -> None:
+    def _update_historical_cache(self, vehicle_id: str, telemetry: Dict, timestamp_ns: int) -> None:
         """Update historical cache for trend analysis"""
-        if vehicle_id not in self._historical_cache:
-            self._historical_cache[vehicle_id] = []
-        
-        self._historical_cache[vehicle_id].append({
-            **telemetry,
-            "timestamp": datetime.utcnow().isoformat()
-        })
+        history = self._historical_cache.get(vehicle_id)
+        if history is None:
+            history = self._historical_cache[vehicle_id] = VehicleHistory()
         
-        # Keep last 100 readings
-        if len(self._historical_cache[vehicle_id]) > 100:
-            self._historical_cache[vehicle_id] = self._historical_cache[vehicle_id][-100:]
+        # Keeps the last _HISTORY_SIZE readings
+        history.append(telemetry, timestamp_ns)
     
     async def _continuous_monitoring(self, payload: Dict[str, Any]) -> Dict[str, Any]:
         """Continuous monitoring mode for real-time analysis"""
@@ -479,29 +758,32 @@ class DataAnalysisAgent:
         duration_seconds = payload.get("duration", 60)
         interval_seconds = payload.get("interval", 5)
         
-        alerts_generated = []
-        readings_analyzed = 0
-        
         # In production, this would be a continuous loop
         # For demo, we simulate a few iterations
         iterations = min(duration_seconds // interval_seconds, 10)
         
+        readings = []
+        reading_times = []
         for _ in range(iterations):
             # Fetch latest telemetry (simulated)
             telemetry = await self._fetch_latest_telemetry(vehicle_id)
-            
             if telemetry:
-                analysis = await self._analyze_telemetry({
-                    "vehicle_id": vehicle_id,
-                    "telemetry": telemetry
-                })
-                readings_analyzed += 1
-                
-                if analysis.get("anomalies"):
-                    alerts_generated.extend(analysis["anomalies"])
+                readings.append(telemetry)
+                reading_times.append(time.time_ns())
             
             await asyncio.sleep(interval_seconds)
         
+        # Analyze the collected readings as one batch, each at its fetch time
+        analyses = await self._analyze_telemetry_batch(
+            vehicle_id, readings, timestamps_ns=reading_times
+        )
+        readings_analyzed = len(analyses)
+        
+        alerts_generated = []
+        for analysis in analyses:
+            if analysis.get("anomalies"):
+                alerts_generated.extend(analysis["anomalies"])
+        
         return {
             "vehicle_id": vehicle_id,
             "monitoring_duration": duration_seconds,
@@ -513,37 +795,32 @@ class DataAnalysisAgent:
     async def _fetch_latest_telemetry(self, vehicle_id: str) -> Optional[Dict]:
         """Fetch latest telemetry from backend"""
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"{self.ml_service_url}/telemetry/{vehicle_id}/latest",
-                    timeout=10.0
-                )
-                if response.status_code == 200:
-                    return response.json()
+            response = await self.http_client.get(f"/telemetry/{vehicle_id}/latest")
+            if response.status_code == 200:
+                return response.json()
         except Exception:
             pass
         return None
     
     async def get_vehicle_summary(self, vehicle_id: str) -> Dict[str, Any]:
         """Get comprehensive summary for a vehicle"""
-        historical = self._historical_cache.get(vehicle_id, [])
+        history = self._historical_cache.get(vehicle_id)
         
-        if not historical:
+        if not history:
             return {"error": "No data available for vehicle", "vehicle_id": vehicle_id}
         
-        latest = historical[-1]
         analysis = await self._analyze_telemetry({
             "vehicle_id": vehicle_id,
-            "telemetry": latest
+            "telemetry": history.latest
         })
         
         return {
             "vehicle_id": vehicle_id,
-            "total_readings": len(historical),
+            "total_readings": len(history),
             "latest_analysis": analysis,
             "data_range": {
-                "start": historical[0].get("timestamp"),
-                "end": historical[-1].get("timestamp")
+                "start": history.first_timestamp(),
+                "end": history.last_timestamp()
             }
         }
 
@@ -584,6 +861,8 @@ if __name__ == "__main__":
         )
         
         result = await agent.execute(task)
-        print(json.dumps(result.result, indent=2))
+        print(_format_json(result.result))
+        
+        await agent.shutdown()
     
     asyncio.run(test())
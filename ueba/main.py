@@ -57,6 +57,9 @@ class AgentAction(BaseModel):
 class ScoreRequest(BaseModel):
     agent_action: AgentAction
 
+class ScoreBatchRequest(BaseModel):
+    actions: List[AgentAction]
+
 class ScoreResponse(BaseModel):
     action_id: str
     score: float
@@ -287,6 +290,60 @@ async def health():
     )
 
 
+def score_agent_action(action: AgentAction) -> ScoreResponse:
+    """Score one agent action, record it, and raise an alert if anomalous"""
+    # Set timestamp if not provided
+    if not action.timestamp:
+        action.timestamp = datetime.now().isoformat()
+    
+    # Calculate anomaly score
+    score, is_anomaly, risk_level, reason = calculate_anomaly_score(action)
+    
+    # Store action in history
+    action_dict = action.dict()
+    agent_actions_history.append(action_dict)
+    
+    # Generate alert if anomaly detected
+    if is_anomaly:
+        alert_id = f"ALT-{datetime.now().strftime('%Y%m%d%H%M%S')}-{len(alerts_history)}"
+        alert = Alert(
+            alert_id=alert_id,
+            agent_id=action.agent_id,
+            agent_type=action.agent_type,
+            action_type=action.action_type,
+            anomaly_score=score,
+            risk_level=risk_level,
+            reason=reason,
+            details={
+                "payload_size": action.payload_size,
+                "response_time_ms": action.response_time_ms,
+                "success": action.success,
+                "vehicle_id": action.vehicle_id,
+                "target_entity": action.target_entity
+            },
+            timestamp=datetime.now().isoformat(),
+            resolved=False
+        )
+        alerts_history.append(alert.dict())
+        logger.warning(f"Anomaly detected: {alert_id} - {reason}")
+    
+    # Periodically retrain model
+    if len(agent_actions_history) % 100 == 0:
+        train_isolation_forest()
+    
+    action_id = f"ACT-{datetime.now().strftime('%Y%m%d%H%M%S')}"
+    
+    return ScoreResponse(
+        action_id=action_id,
+        score=round(score, 4),
+        is_anomaly=is_anomaly,
+        alert=is_anomaly and risk_level in ["High", "Critical"],
+        reason=reason,
+        risk_level=risk_level,
+        timestamp=datetime.now().isoformat()
+    )
+
+
 @app.post("/score", response_model=ScoreResponse)
 async def score_action(request: ScoreRequest):
     """
@@ -295,64 +352,28 @@ async def score_action(request: ScoreRequest):
     Returns anomaly score, alert status, and risk level.
     """
     try:
-        action = request.agent_action
-        
-        # Set timestamp if not provided
-        if not action.timestamp:
-            action.timestamp = datetime.now().isoformat()
-        
-        # Calculate anomaly score
-        score, is_anomaly, risk_level, reason = calculate_anomaly_score(action)
-        
-        # Store action in history
-        action_dict = action.dict()
-        agent_actions_history.append(action_dict)
-        
-        # Generate alert if anomaly detected
-        if is_anomaly:
-            alert_id = f"ALT-{datetime.now().strftime('%Y%m%d%H%M%S')}-{len(alerts_history)}"
-            alert = Alert(
-                alert_id=alert_id,
-                agent_id=action.agent_id,
-                agent_type=action.agent_type,
-                action_type=action.action_type,
-                anomaly_score=score,
-                risk_level=risk_level,
-                reason=reason,
-                details={
-                    "payload_size": action.payload_size,
-                    "response_time_ms": action.response_time_ms,
-                    "success": action.success,
-                    "vehicle_id": action.vehicle_id,
-                    "target_entity": action.target_entity
-                },
-                timestamp=datetime.now().isoformat(),
-                resolved=False
-            )
-            alerts_history.append(alert.dict())
-            logger.warning(f"Anomaly detected: {alert_id} - {reason}")
-        
-        # Periodically retrain model
-        if len(agent_actions_history) % 100 == 0:
-            train_isolation_forest()
-        
-        action_id = f"ACT-{datetime.now().strftime('%Y%m%d%H%M%S')}"
-        
-        return ScoreResponse(
-            action_id=action_id,
-            score=round(score, 4),
-            is_anomaly=is_anomaly,
-            alert=is_anomaly and risk_level in ["High", "Critical"],
-            reason=reason,
-            risk_level=risk_level,
-            timestamp=datetime.now().isoformat()
-        )
+        return score_agent_action(request.agent_action)
         
     except Exception as e:
         logger.error(f"Error scoring action: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/score/batch", response_model=List[ScoreResponse])
+async def score_actions_batch(request: ScoreBatchRequest):
+    """
+    Score a batch of agent actions for anomalies
+    
+    Used for fire-and-forget reports; returns one score per action, in order.
+    """
+    try:
+        return [score_agent_action(action) for action in request.actions]
+        
+    except Exception as e:
+        logger.error(f"Error scoring action batch: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @app.get("/alerts", response_model=AlertsResponse)
 async def get_alerts(
     limit: int = 50,